@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Shared atomic-write layer for the task scripts.
+
+Writers take an advisory lock on a sidecar ``<file>.lock``, write to a
+unique temp file in the same directory, fsync it and atomically rename it
+over the target. An optional expected version guards against a concurrent
+writer having replaced the file since it was read.
+
+Typical read-modify-write:
+
+    def transform(rows):
+        ...
+        return rows
+
+    update_csv(csv_path, transform)
+"""
+import csv
+import hashlib
+import io
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Seconds to wait for a lock before giving up
+LOCK_TIMEOUT = 60.0
+LOCK_POLL_INTERVAL = 0.05
+
+# Permissions for files created by atomic_open()
+DEFAULT_FILE_MODE = 0o644
+
+# Attempts made by update_csv() before giving up on repeated conflicts
+UPDATE_RETRIES = 5
+
+class LockTimeout(Exception):
+    """Raised when a file lock cannot be acquired in time."""
+
+class ConcurrentModificationError(Exception):
+    """Raised when the target changed after it was read."""
+
+def lock_path_for(path):
+    path = Path(path)
+    return path.with_name(path.name + '.lock')
+
+def _try_lock(fd):
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """Hold an exclusive advisory lock for path while the block runs."""
+    lock_path = lock_path_for(path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise LockTimeout(f"Timed out after {timeout}s waiting for lock on {path}")
+            time.sleep(LOCK_POLL_INTERVAL)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+def file_version(path):
+    """Return a content hash identifying the current version of path, or None if missing."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _fsync_dir(directory):
+    if fcntl is None:
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+@contextmanager
+def atomic_open(path, mode='w', expected_version=None, lock=True, encoding='utf-8', newline='',
+                on_commit=None, **kwargs):
+    """
+    Open a unique temp file that replaces path when the block exits cleanly.
+
+    If expected_version is given, the replace only happens when path still
+    has that version (see file_version); otherwise ConcurrentModificationError
+    is raised and path is left untouched. The temp file is removed on any
+    failure. Pass lock=False when the caller already holds file_lock(path).
+
+    on_commit, if given, is called with path right after the replace and
+    before the lock is released, so it sees exactly the bytes just written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    # mkstemp creates 0600 files; keep the target's permissions instead
+    os.chmod(tmp_name, path.stat().st_mode & 0o777 if path.exists() else DEFAULT_FILE_MODE)
+    if 'b' in mode:
+        f = os.fdopen(fd, mode, **kwargs)
+    else:
+        f = os.fdopen(fd, mode, encoding=encoding, newline=newline, **kwargs)
+    try:
+        with f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if lock:
+            with file_lock(path):
+                _commit(tmp_name, path, expected_version, on_commit)
+        else:
+            _commit(tmp_name, path, expected_version, on_commit)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+def _commit(tmp_name, path, expected_version, on_commit=None):
+    if expected_version is not None and file_version(path) != expected_version:
+        raise ConcurrentModificationError(f"{path} was modified by another writer")
+    os.replace(tmp_name, path)
+    _fsync_dir(path.parent)
+    if on_commit is not None:
+        on_commit(path)
+
+def read_csv_rows(path):
+    """Read raw CSV rows (header included) along with the file version they came from."""
+    path = Path(path)
+    data = path.read_bytes()
+    version = hashlib.sha256(data).hexdigest()
+    return list(csv.reader(io.StringIO(data.decode('utf-8'), newline=''))), version
+
+def write_csv_rows(path, rows, expected_version=None, lock=True, on_commit=None):
+    """Atomically replace path with raw CSV rows and return the new file version."""
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer).writerows(rows)
+    data = buffer.getvalue().encode('utf-8')
+    with atomic_open(path, mode='wb', expected_version=expected_version, lock=lock, on_commit=on_commit) as f:
+        f.write(data)
+    return hashlib.sha256(data).hexdigest()
+
+def update_csv(path, transform, retries=UPDATE_RETRIES, on_commit=None):
+    """
+    Read-modify-write a CSV with optimistic concurrency.
+
+    transform receives the raw rows and returns the rows to write. If another
+    writer commits in between, the rows are re-read and transform runs again.
+    on_commit is passed to atomic_open. Returns the rows that were written
+    and the new file version.
+    """
+    for attempt in range(retries):
+        rows, version = read_csv_rows(path)
+        new_rows = transform(rows)
+        try:
+            return new_rows, write_csv_rows(path, new_rows, expected_version=version, on_commit=on_commit)
+        except ConcurrentModificationError:
+            if attempt == retries - 1:
+                raise
+            time.sleep(LOCK_POLL_INTERVAL * (attempt + 1))
@@ -3,12 +3,35 @@
 Consolidate all task tracking files into one master CSV.
 """
 import csv
+import itertools
 import sys
 from pathlib import Path
 from collections import defaultdict
 from datetime import datetime
 import re
 
+from external_sort import estimate_row_size, external_sort
+from instruction_cache import InstructionCache, cache_key, rules_version
+from markdown_source import collect_markdown_rows
+from spill_dedupe import deduplicate_spilling
+from task_exporters import ExportError, export_tasks
+from task_ids import content_key, open_registry, task_fingerprint
+from task_rollups import TaskRollup
+from task_shards import sync_shards
+from task_snapshots import add_snapshot_from_csv
+from test_matcher import (
+    LARGE_MATRIX_POSTING_FRACTION,
+    MAX_POSTING_FRACTION,
+    MIN_MAX_POSTINGS,
+    SCENARIO_FIELD_WEIGHTS,
+    STOPWORDS,
+    TASK_FIELD_WEIGHTS,
+    build_scenario_index,
+    format_instructions,
+    match_task,
+)
+from xlsx_source import iter_xlsx_dicts
+
 # Base directory
 BASE_DIR = Path(__file__).parent.parent
 
@@ -18,9 +41,48 @@ INPUT_FILES = {
     'test_matrix': BASE_DIR / 'off_axis_done_feature_test_matrix.csv',
 }
 
+# Spreadsheet inputs. 'columns' maps task CSV headers (Category, Priority,
+# Task, CursorPrompt, Status, StatusNotes) to header prefixes in the sheet.
+XLSX_INPUT_FILES = [
+    {
+        'path': BASE_DIR / 'My Test.xlsx',
+        'sheet': None,
+        'columns': {
+            'Category': 'My own test matrix',
+            'Task': 'What I want changed',
+            'StatusNotes': 'What I don',
+        },
+    },
+]
+
 # Output file
 OUTPUT_FILE = BASE_DIR / 'docs' / 'off_axis_deals_master_tasks.csv'
 
+# Markdown tracking documents scanned for checklist items, tables and status headings.
+# Listed explicitly so runbooks and setup guides are not read as task lists.
+MARKDOWN_INPUTS = [
+    'TODO_LIST.md',
+    'PRE_LAUNCH_ISSUES.md',
+    'QUICK_TEST_MATRIX.md',
+    'CURRENT_STATUS.md',
+    'FIXES_SUMMARY.md',
+    '*_FIXES_SUMMARY.md',
+    'docs/tasks.md',
+]
+
+# Approximate bytes of source tasks deduplicated in memory before spilling to disk (see spill_dedupe.py)
+DEDUPE_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Approximate bytes of rows sorted in memory before spilling runs to disk
+SORT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Formats written alongside the master CSV (see task_exporters.EXPORTERS)
+EXPORT_FORMATS = ['csv', 'jsonl', 'markdown']
+
+# Test-matrix matching: scenarios attached per task and minimum cosine score
+MATCH_TOP_K = 3
+MATCH_THRESHOLD = 0.15
+
 # Master CSV columns
 COLUMNS = [
     'ID',
@@ -84,6 +146,32 @@ def extract_routes(description, task_name):
     unique_routes = sorted(set(routes))
     return ', '.join(unique_routes[:3]) if unique_routes else ''
 
+def parse_task_rows(rows):
+    """Yield task dicts from rows shaped like the tasks status CSV."""
+    for row in rows:
+        category = row.get('Category', '').strip()
+        priority = normalize_priority(row.get('Priority', ''))
+        task = row.get('Task', '').strip()
+        status = normalize_status(row.get('Status', ''))
+        notes = row.get('StatusNotes', '').strip()
+        cursor_prompt = row.get('CursorPrompt', '').strip()
+        
+        if not task:
+            continue
+        
+        # Extract route from prompt or task name
+        route = extract_routes(cursor_prompt, task)
+        
+        yield {
+            'feature': category or 'General',
+            'route': route,
+            'description': task,
+            'priority': priority,
+            'status': status,
+            'notes': notes,
+            'test_instructions': '',  # Will be filled from test matrix
+        }
+
 def parse_tasks_status_csv():
     """Parse the main tasks status CSV."""
     tasks = []
@@ -95,43 +183,69 @@ def parse_tasks_status_csv():
     
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                category = row.get('Category', '').strip()
-                priority = normalize_priority(row.get('Priority', ''))
-                task = row.get('Task', '').strip()
-                status = normalize_status(row.get('Status', ''))
-                notes = row.get('StatusNotes', '').strip()
-                cursor_prompt = row.get('CursorPrompt', '').strip()
-                
-                if not task:
-                    continue
-                
-                # Extract route from prompt or task name
-                route = extract_routes(cursor_prompt, task)
-                
-                tasks.append({
-                    'feature': category or 'General',
-                    'route': route,
-                    'description': task,
-                    'priority': priority,
-                    'status': status,
-                    'notes': notes,
-                    'test_instructions': '',  # Will be filled from test matrix
-                })
+            # Extend row by row so tasks read before a bad row are kept
+            tasks.extend(parse_task_rows(csv.DictReader(f)))
     except Exception as e:
         print(f"Error parsing {file_path}: {e}")
     
     return tasks
 
+def _map_columns(rows, columns):
+    """Rename spreadsheet headers to task CSV headers, matching by case-insensitive prefix."""
+    resolved = None
+    for row in rows:
+        if resolved is None:
+            resolved = {}
+            for target, prefix in columns.items():
+                for header in row:
+                    if header.lower().startswith(prefix.lower()):
+                        resolved[target] = header
+                        break
+        mapped = dict(row)
+        for target, header in resolved.items():
+            mapped[target] = row.get(header, '')
+        yield mapped
+
+def parse_xlsx_sources():
+    """Parse task spreadsheets, streaming rows straight into the task pipeline."""
+    for source in XLSX_INPUT_FILES:
+        file_path = source['path']
+        
+        if not file_path.exists():
+            print(f"Warning: {file_path} not found")
+            continue
+        
+        try:
+            rows = iter_xlsx_dicts(file_path, source.get('sheet'))
+            yield from parse_task_rows(_map_columns(rows, source.get('columns', {})))
+        except Exception as e:
+            print(f"Error parsing {file_path}: {e}")
+
+def parse_markdown_sources():
+    """Extract candidate tasks from the Markdown tracking documents."""
+    paths = []
+    for pattern in MARKDOWN_INPUTS:
+        for path in sorted(BASE_DIR.glob(pattern)):
+            if path not in paths:
+                paths.append(path)
+    
+    try:
+        rows, parsed = collect_markdown_rows(paths, base_dir=BASE_DIR)
+    except Exception as e:
+        print(f"Error parsing Markdown documents: {e}")
+        return []
+    
+    print(f"  Markdown: {len(paths)} documents, {parsed} parsed, {len(paths) - parsed} unchanged")
+    return list(parse_task_rows(rows))
+
 def parse_test_matrix_csv():
-    """Parse the test matrix CSV."""
-    tests = {}
+    """Parse the test matrix CSV into a list of scenarios."""
+    scenarios = []
     file_path = INPUT_FILES['test_matrix']
     
     if not file_path.exists():
         print(f"Warning: {file_path} not found")
-        return tests
+        return scenarios
     
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -148,43 +262,70 @@ def parse_test_matrix_csv():
                 # Combine test instructions
                 instructions = f"{test_steps}\nExpected: {expected}" if expected else test_steps
                 
-                # Key by feature name for matching
-                key = feature.lower()
-                if key not in tests:
-                    tests[key] = []
-                tests[key].append(instructions)
+                scenarios.append({
+                    'feature': feature,
+                    'scenario': scenario,
+                    'steps': test_steps,
+                    'instructions': instructions,
+                })
     except Exception as e:
         print(f"Error parsing {file_path}: {e}")
     
-    return tests
+    return scenarios
+
+def task_signature(task):
+    """Create a signature for deduplication from description and route."""
+    return content_key(task['description'], task['route'])
+
+def merge_task(existing, task):
+    """Merge a duplicate task into the one seen first."""
+    # Merge notes
+    if task['notes'] and task['notes'] not in existing['notes']:
+        existing['notes'] += f" | {task['notes']}"
+    
+    # Merge test instructions
+    if task['test_instructions'] and task['test_instructions'] not in existing['test_instructions']:
+        existing['test_instructions'] += f"\n\nAdditional: {task['test_instructions']}"
+    
+    # Keep higher priority
+    if task['priority'] == 'High' and existing['priority'] != 'High':
+        existing['priority'] = 'High'
+
+def _drain(head, rest):
+    """Yield head then rest, releasing head's items as they are consumed."""
+    head.reverse()
+    while head:
+        yield head.pop()
+    yield from rest
 
 def deduplicate_tasks(tasks):
-    """Deduplicate tasks by description and route."""
+    """
+    Deduplicate tasks by description and route.
+
+    Returns a list, or once the tasks exceed roughly DEDUPE_MEMORY_BUDGET
+    bytes a generator backed by disk, so at most that much task data is
+    ever buffered in memory.
+    """
+    tasks = iter(tasks)
+    head = []
+    head_size = 0
+    for task in tasks:
+        head.append(task)
+        head_size += estimate_row_size(task)
+        if head_size > DEDUPE_MEMORY_BUDGET:
+            # Too much to hold in RAM: keep only hashes and spill merge state
+            return deduplicate_spilling(_drain(head, tasks), task_signature, merge_task)
+    
     seen = defaultdict(list)
     unique_tasks = []
     
-    for task in tasks:
-        # Create a signature for deduplication
-        desc_key = task['description'].lower().strip()[:100]
-        route_key = task['route'].lower().strip()
-        signature = f"{desc_key}|{route_key}"
+    for task in head:
+        signature = task_signature(task)
         
         if signature in seen:
             # Merge with existing task
             existing_idx = seen[signature][0]
-            existing = unique_tasks[existing_idx]
-            
-            # Merge notes
-            if task['notes'] and task['notes'] not in existing['notes']:
-                existing['notes'] += f" | {task['notes']}"
-            
-            # Merge test instructions
-            if task['test_instructions'] and task['test_instructions'] not in existing['test_instructions']:
-                existing['test_instructions'] += f"\n\nAdditional: {task['test_instructions']}"
-            
-            # Keep higher priority
-            if task['priority'] == 'High' and existing['priority'] != 'High':
-                existing['priority'] = 'High'
+            merge_task(unique_tasks[existing_idx], task)
         else:
             # New task
             idx = len(unique_tasks)
@@ -228,57 +369,97 @@ def add_known_issues():
 def main():
     print("Consolidating task tracking files...")
     
-    # Parse all input files
-    tasks = parse_tasks_status_csv()
+    # Parse all input files; spreadsheets stream their rows lazily
+    known_issues = add_known_issues()
+    tasks = itertools.chain(
+        parse_tasks_status_csv(),
+        parse_xlsx_sources(),
+        parse_markdown_sources(),
+        known_issues,
+    )
     test_matrix = parse_test_matrix_csv()
     
-    # Add known critical issues
-    known_issues = add_known_issues()
-    tasks.extend(known_issues)
+    # Match test instructions from test matrix, reusing cached results for
+    # tasks whose inputs and matching rules are unchanged since the last run
+    matcher_version = rules_version(
+        test_matrix, MATCH_TOP_K, MATCH_THRESHOLD,
+        SCENARIO_FIELD_WEIGHTS, TASK_FIELD_WEIGHTS, sorted(STOPWORDS),
+        MAX_POSTING_FRACTION, LARGE_MATRIX_POSTING_FRACTION, MIN_MAX_POSTINGS,
+    )
+    scenario_index = None
     
-    # Match test instructions from test matrix
-    for task in tasks:
-        feature_key = task['feature'].lower()
-        for test_key, instructions in test_matrix.items():
-            if test_key in feature_key or feature_key in test_key:
-                if instructions:
-                    task['test_instructions'] = '\n\n'.join(instructions)
-                break
+    def generate(task):
+        nonlocal scenario_index
+        if scenario_index is None:
+            scenario_index = build_scenario_index(test_matrix)
+        matches = match_task(scenario_index, task, top_k=MATCH_TOP_K, threshold=MATCH_THRESHOLD)
+        return matcher_version, format_instructions(matches)
+    
+    def with_instructions(tasks, cache):
+        for task in tasks:
+            if not task['test_instructions']:
+                key = cache_key('consolidate_tasks', task['feature'], task['description'], task['route'], task['status'])
+                task['test_instructions'] = cache.get_or_create(key, {matcher_version}, lambda: generate(task))
+            yield task
+    
+    today = datetime.now().strftime('%Y-%m-%d')
     
-    # Deduplicate
-    unique_tasks = deduplicate_tasks(tasks)
+    def output_rows(unique_tasks, registry):
+        # IDs come from the content map so a task keeps its ID across runs
+        for task in unique_tasks:
+            yield {
+                'ID': registry.claim(task_fingerprint(task['description'], task['route'])),
+                'Feature / Area': task['feature'],
+                'Page / Route': task['route'],
+                'Description': task['description'],
+                'Priority': task['priority'],
+                'Status': task['status'],
+                'Owner': '',  # To be filled manually
+                'Environment': 'Both',  # Default
+                'Last Updated': today,
+                'Test Instructions': task['test_instructions'],
+                'Notes': task['notes'],
+            }
     
-    # Assign IDs and format for output
-    output_rows = []
-    for idx, task in enumerate(unique_tasks, 1):
-        task_id = f"TASK-{idx:03d}"
-        output_rows.append({
-            'ID': task_id,
-            'Feature / Area': task['feature'],
-            'Page / Route': task['route'],
-            'Description': task['description'],
-            'Priority': task['priority'],
-            'Status': task['status'],
-            'Owner': '',  # To be filled manually
-            'Environment': 'Both',  # Default
-            'Last Updated': datetime.now().strftime('%Y-%m-%d'),
-            'Test Instructions': task['test_instructions'],
-            'Notes': task['notes'],
-        })
+    # Consolidation replaces every row, so the rollup restarts from these rows
+    rollup = TaskRollup()
+    
+    def counted(rows):
+        for row in rows:
+            rollup.apply(None, row)
+            yield row
+    
+    def committed(path):
+        # Runs under the master's lock, against the bytes just written
+        rollup.save_for(path)
+        sync_shards(path)
     
     # Write output CSV
     output_file = OUTPUT_FILE
     output_file.parent.mkdir(parents=True, exist_ok=True)
     
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=COLUMNS)
-        writer.writeheader()
-        writer.writerows(output_rows)
+    # Every stage streams; deduplication and sorting spill to disk when large.
+    # The ID map stays locked for the run and is saved once, after the export.
+    with InstructionCache() as cache, open_registry() as registry:
+        unique_tasks = deduplicate_tasks(with_instructions(tasks, cache))
+        rows = counted(output_rows(unique_tasks, registry))
+        sorted_rows = external_sort(rows, memory_budget=SORT_MEMORY_BUDGET)
+        try:
+            written = export_tasks(sorted_rows, output_file, COLUMNS, EXPORT_FORMATS, on_commit=committed)
+        except ExportError as e:
+            # Nothing was replaced, so the rollup and archive must not move either
+            print(f"❌ {e}")
+            sys.exit(1)
+    
+    total = rollup.total()
+    print(f"✓ Consolidated {total} unique tasks")
+    for path in written.values():
+        print(f"✓ Written to: {path}")
     
-    print(f"✓ Consolidated {len(output_rows)} unique tasks")
-    print(f"✓ Written to: {output_file}")
+    snapshot_id = add_snapshot_from_csv(output_file)
+    print(f"✓ Archived as snapshot {snapshot_id}")
     print(f"  - {len(known_issues)} known critical issues")
-    print(f"  - {len(unique_tasks) - len(known_issues)} tasks from input files")
+    print(f"  - {total - len(known_issues)} tasks from input files")
 
 if __name__ == '__main__':
     main()
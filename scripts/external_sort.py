@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Bounded-memory external merge sort for task rows.
+
+Rows are buffered until a memory budget is reached, sorted and spilled to a
+temp file as a run; the runs are then k-way merged while streaming the
+output. Ties keep their input order, so the sort is stable.
+
+Usage:
+    python scripts/external_sort.py [CSV] [--memory-mb N]
+"""
+import csv
+import heapq
+import pickle
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+from atomic_io import atomic_open, file_lock, file_version
+
+BASE_DIR = Path(__file__).parent.parent
+
+MASTER_CSV = BASE_DIR / 'docs' / 'off_axis_deals_master_tasks.csv'
+
+# Approximate bytes of row data held in memory before a run is spilled
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+# Rough per-row overhead of the dict and tuple wrappers, in bytes
+ROW_OVERHEAD = 400
+
+PRIORITY_ORDER = ['High', 'Medium', 'Low']
+
+# Status order for the master file and Markdown sections; unknown statuses follow alphabetically
+STATUS_ORDER = [
+    'Not Started',
+    'Planned',
+    'In Progress',
+    'Partially Done – Needs Testing',
+    'Blocked',
+    'Passed',
+    "Won't Do",
+]
+
+_DIGITS_RE = re.compile(r'(\d+)')
+
+def _rank(value, order):
+    return order.index(value) if value in order else len(order)
+
+def natural_key(value):
+    """Order IDs like TASK-9 before TASK-10."""
+    return tuple(int(part) if part.isdigit() else part for part in _DIGITS_RE.split(value or ''))
+
+def task_sort_key(row):
+    """Master file order: Priority, Status, Feature / Area, then ID."""
+    priority = row.get('Priority', '')
+    status = row.get('Status', '')
+    return (
+        _rank(priority, PRIORITY_ORDER), priority,
+        _rank(status, STATUS_ORDER), status,
+        (row.get('Feature / Area') or '').lower(),
+        natural_key(row.get('ID', '')),
+    )
+
+def positional_sort_key(header):
+    """Build task_sort_key for raw csv.reader rows laid out like header."""
+    positions = {name: header.index(name) for name in ('ID', 'Feature / Area', 'Priority', 'Status') if name in header}
+
+    def key(row):
+        return task_sort_key({
+            name: (row[i] if i < len(row) else '') for name, i in positions.items()
+        })
+    return key
+
+def estimate_row_size(row):
+    """Approximate bytes a dict or list row of strings takes in memory."""
+    values = row.values() if isinstance(row, dict) else row
+    return ROW_OVERHEAD + sum(len(value) for value in values if isinstance(value, str))
+
+def _spill(run, tmp_dir):
+    run.sort()
+    f = tempfile.TemporaryFile(dir=tmp_dir)
+    pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+    for item in run:
+        pickler.dump(item)
+    f.seek(0)
+    return f
+
+def _read_run(f):
+    unpickler = pickle.Unpickler(f)
+    while True:
+        try:
+            yield unpickler.load()
+        except EOFError:
+            return
+
+class ExternalSorter:
+    """
+    Collect rows one at a time and yield them back sorted by key.
+
+    Sorted runs are spilled to temp files in tmp_dir whenever roughly
+    memory_budget bytes of row data are buffered, and merged lazily when the
+    rows are read back. Close the sorter (or use it as a context manager) to
+    drop the runs.
+    """
+
+    def __init__(self, key=task_sort_key, memory_budget=DEFAULT_MEMORY_BUDGET, tmp_dir=None):
+        self.key = key
+        self.memory_budget = memory_budget
+        self.tmp_dir = tmp_dir
+        self.run = []
+        self.run_size = 0
+        self.spilled = []
+        self.seq = 0
+
+    def add(self, row):
+        self.run.append((self.key(row), self.seq, row))
+        self.seq += 1
+        self.run_size += estimate_row_size(row)
+        if self.run_size >= self.memory_budget:
+            self.spilled.append(_spill(self.run, self.tmp_dir))
+            self.run = []
+            self.run_size = 0
+
+    def extend(self, rows):
+        for row in rows:
+            self.add(row)
+
+    def sorted(self):
+        """Yield every row added so far in key order; ties keep their input order."""
+        if not self.spilled:
+            self.run.sort()
+            for _, _, row in self.run:
+                yield row
+            return
+
+        if self.run:
+            self.spilled.append(_spill(self.run, self.tmp_dir))
+            self.run = []
+        for _, _, row in heapq.merge(*(_read_run(f) for f in self.spilled)):
+            yield row
+
+    def close(self):
+        for f in self.spilled:
+            f.close()
+        self.spilled = []
+        self.run = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def external_sort(rows, key=task_sort_key, memory_budget=DEFAULT_MEMORY_BUDGET, tmp_dir=None):
+    """
+    Yield rows sorted by key using at most roughly memory_budget bytes of row data.
+
+    When everything fits the rows are sorted in memory; otherwise sorted runs
+    are spilled to temp files in tmp_dir and merged lazily.
+    """
+    with ExternalSorter(key, memory_budget, tmp_dir) as sorter:
+        sorter.extend(rows)
+        yield from sorter.sorted()
+
+def sort_csv(csv_path=MASTER_CSV, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """
+    Sort a master CSV in place without loading it, returning the number of rows.
+
+    Rows are sorted as raw field lists, so every cell is copied through
+    unchanged even when the header has blank or repeated column names.
+    """
+    csv_path = Path(csv_path)
+    with file_lock(csv_path):
+        version = file_version(csv_path)
+        count = 0
+        with atomic_open(csv_path, expected_version=version, lock=False) as dst:
+            # The source is closed before the replace, which Windows requires
+            with open(csv_path, 'r', encoding='utf-8', newline='') as src:
+                reader = csv.reader(src)
+                header = next(reader, [])
+                writer = csv.writer(dst)
+                writer.writerow(header)
+                key = positional_sort_key(header)
+                for row in external_sort(reader, key, memory_budget=memory_budget, tmp_dir=csv_path.parent):
+                    writer.writerow(row)
+                    count += 1
+    return count
+
+def main():
+    args = sys.argv[1:]
+    csv_path = MASTER_CSV
+    memory_budget = DEFAULT_MEMORY_BUDGET
+    while args:
+        arg = args.pop(0)
+        if arg == '--memory-mb' and args:
+            memory_budget = int(float(args.pop(0)) * 1024 * 1024)
+        elif not arg.startswith('-'):
+            csv_path = Path(arg)
+        else:
+            print(__doc__)
+            sys.exit(1)
+    count = sort_csv(csv_path, memory_budget)
+    print(f"✓ Sorted {count} tasks in {csv_path}")
+
+if __name__ == '__main__':
+    main()
@@ -3,20 +3,21 @@
 Finalize CSV update by appending new tasks
 """
 
-import csv
 import sys
 from pathlib import Path
 from datetime import datetime
 
+from atomic_io import ConcurrentModificationError, LockTimeout, read_csv_rows, write_csv_rows
+from task_rollups import update_rollup
+from task_shards import sync_shards
+
 # Paths
 csv_path = Path('docs/off_axis_deals_master_tasks.csv')
 output_path = csv_path
 
 # Read existing CSV
 print(f"Reading existing CSV from {csv_path}...")
-with open(csv_path, 'r', encoding='utf-8') as f:
-    reader = csv.reader(f)
-    rows = list(reader)
+rows, version = read_csv_rows(csv_path)
 
 print(f"Found {len(rows)} rows (including header)")
 print(f"Existing tasks: {len(rows) - 1}")
@@ -53,25 +54,24 @@ if len(rows) - 1 == 64:
     all_rows = rows + new_tasks
     print(f"✅ Total rows will be: {len(all_rows)} (1 header + {len(all_rows)-1} tasks)")
     
-    # Write updated CSV
-    temp_path = output_path.with_suffix('.csv.tmp')
-    with open(temp_path, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerows(all_rows)
-    
-    print(f"✅ Wrote to {temp_path}")
-    
-    # Replace original
+    # Atomically replace the original, refusing if another run changed it meanwhile
     try:
-        output_path.replace(temp_path)
+        def committed(path):
+            update_rollup(path, [(None, task) for task in new_tasks], rows[0], version)
+            sync_shards(path)
+        
+        write_csv_rows(output_path, all_rows, expected_version=version, on_commit=committed)
         print(f"✅ Successfully updated {output_path}")
         print(f"   - Existing tasks: {len(rows) - 1}")
         print(f"   - New tasks added: {len(new_tasks)}")
         print(f"   - Total tasks: {len(all_rows) - 1}")
-    except Exception as e:
-        print(f"⚠️  Could not replace original file: {e}")
-        print(f"✅ Updated file is at {temp_path}")
-        print(f"   Please manually rename it to {output_path.name}")
+    except ConcurrentModificationError:
+        print(f"⚠️  {output_path} was changed by another run; nothing was written.")
+        print("   Re-run this script to append on top of the latest version.")
+        sys.exit(1)
+    except LockTimeout as e:
+        print(f"⚠️  {e}")
+        sys.exit(1)
 
 else:
     print(f"⚠️  File has {len(rows) - 1} tasks, expected 64. Not appending new tasks.")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Persistent content-addressed cache for generated test instructions.
+
+Entries live in a small SQLite file shared by all task scripts. Keys are
+hashes of the inputs a generator reads (description, route, status, ...);
+each entry also records the version of the rules that produced it, and a
+lookup only hits when that version is still current. Least recently used
+entries are evicted once the stored values exceed the size cap.
+"""
+import hashlib
+import sqlite3
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+
+CACHE_PATH = BASE_DIR / '.cache' / 'test_instructions.sqlite'
+
+# Upper bound on the total size of cached values, in bytes
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+
+# Seconds SQLite waits on another process holding the database
+BUSY_TIMEOUT = 30.0
+
+def cache_key(namespace, *parts):
+    """Hash a namespace and input fields into a cache key."""
+    digest = hashlib.sha256(namespace.encode('utf-8'))
+    for part in parts:
+        digest.update(b'\x1f')
+        digest.update((part or '').encode('utf-8'))
+    return digest.hexdigest()
+
+def rules_version(*parts):
+    """Hash rule definitions (instructions, match terms, parameters) into a version string."""
+    return cache_key('rules', *(repr(part) for part in parts))
+
+class InstructionCache:
+    """LRU-evicting on-disk cache of generated instructions."""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            ' key TEXT PRIMARY KEY,'
+            ' version TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' size INTEGER NOT NULL,'
+            ' last_used REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)')
+        self._conn.commit()
+        self._touched = []
+
+    def get(self, key, valid_versions):
+        """Return the cached value for key if its version is in valid_versions, else None."""
+        row = self._conn.execute('SELECT version, value FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None or row[0] not in valid_versions:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append((time.time(), key))
+        return row[1]
+
+    def put(self, key, version, value):
+        """Store value for key, replacing any stale entry."""
+        self._conn.execute(
+            'INSERT OR REPLACE INTO entries (key, version, value, size, last_used) VALUES (?, ?, ?, ?, ?)',
+            (key, version, value, len(value.encode('utf-8')), time.time()),
+        )
+
+    def get_or_create(self, key, valid_versions, generate):
+        """Return the cached value, or call generate() -> (version, value) and cache it."""
+        value = self.get(key, valid_versions)
+        if value is None:
+            version, value = generate()
+            self.put(key, version, value)
+        return value
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in self._conn.execute('SELECT key, size FROM entries ORDER BY last_used'):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self._conn.executemany('DELETE FROM entries WHERE key = ?', stale)
+
+    def flush(self):
+        """Persist pending recency updates and inserts, then enforce the size cap."""
+        if self._touched:
+            self._conn.executemany('UPDATE entries SET last_used = ? WHERE key = ?', self._touched)
+            self._touched = []
+        self._evict()
+        self._conn.commit()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Extract candidate tasks from the repo's Markdown status and checklist documents.
+
+Checklist items, task-like tables and headings carrying a **Status:** or
+**Priority:** field are turned into rows shaped like the tasks status CSV
+(Category, Priority, Task, Status, StatusNotes) so they flow through the
+normal normalize/dedupe stages. Documents are parsed in a process pool and
+results are cached by mtime and content hash, so unchanged files are skipped.
+"""
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from atomic_io import atomic_open, file_lock
+
+BASE_DIR = Path(__file__).parent.parent
+
+CACHE_PATH = BASE_DIR / '.cache' / 'markdown_tasks.json'
+
+# Bump when extraction rules change so cached results are discarded
+PARSER_VERSION = 3
+
+# Below this many changed documents parsing inline beats starting a pool
+MIN_PARALLEL_FILES = 4
+
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+CHECKBOX_RE = re.compile(r'^\s*[-*+]\s+\[([ xX])\]\s+(.*\S)\s*$')
+FIELD_RE = re.compile(r'^\*\*(Status|Priority):\*\*\s*(.*?)\s*$')
+TABLE_DIVIDER_RE = re.compile(r'^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$')
+PRIORITY_WORDS_RE = re.compile(r'\b(critical|highest|high|medium|low)\b', re.IGNORECASE)
+
+# Priority words found in headings and **Priority:** fields -> task CSV priority
+PRIORITY_WORDS = {'critical': 'High', 'highest': 'High', 'high': 'High', 'medium': 'Medium', 'low': 'Low'}
+
+# Status words (whole words, lowercased) -> task CSV status, checked in this order.
+# Done words preceded by a negation ("not fixed", "no longer done") do not count,
+# and a done word next to a blocker or testing word ("fixed, needs testing") is
+# reported as Blocked or Needs Testing instead.
+STATUS_WORDS = [
+    ('Done', {'done', 'complete', 'completed', 'fixed', 'finished', 'resolved', 'implemented', 'passed', 'passing'}),
+    ('Blocked', {'blocked', 'blocking', 'blocker'}),
+    ('In Progress', {'progress', 'wip', 'started', 'partial', 'partially', 'ongoing'}),
+    ('Needs Testing', {'test', 'tests', 'testing', 'untested', 'verify', 'verification'}),
+    ('Not Started', {'todo', 'open', 'planned', 'pending', 'incomplete', 'unfixed', 'unresolved', 'missing'}),
+]
+STATUS_EMOJI = [('✅', 'Done'), ('🔴', 'Blocked'), ('🟡', 'In Progress')]
+NEGATIONS = {'not', 'no', 'never', 'isnt', "isn't", 'wasnt', "wasn't", 'without'}
+# Words before a done word that make it partial work ("partially done")
+PARTIAL_WORDS = {'partially', 'partial', 'mostly', 'almost', 'nearly'}
+# Words next to a testing word that report a result rather than pending work ("tests passing")
+TEST_RESULT_WORDS = {'pass', 'passed', 'passes', 'passing'}
+# Statuses that win over Done when both are named
+UNFINISHED_STATUSES = ['Blocked', 'Needs Testing']
+WORD_RE = re.compile(r"[a-z']+")
+
+# Table columns that hold a task description, in order of preference
+TASK_COLUMNS = ['task', 'issue', 'item', 'description', 'feature', 'name', 'test']
+
+def clean_text(text):
+    """Strip Markdown emphasis, leading emoji/numbering and surrounding whitespace."""
+    text = re.sub(r'\*\*|__', '', text)
+    text = re.sub(r'^[^\w`(/\[]+', '', text)
+    text = re.sub(r'^\d+[.)]\s*', '', text)
+    return text.strip()
+
+def _status_from_marker(text):
+    """
+    Map status emoji and words used across the docs to (task CSV status, note).
+
+    Words are matched whole and a negation within the two words before one
+    ("not fixed", "not started") cancels it; "partially done" is In Progress.
+    Done alongside a blocker or a testing word ("code fixed ✅, needs testing
+    after deployment") is Blocked or Needs Testing. Text that names no known
+    status maps to 'Not Started' and is returned as the note so it is not lost.
+    """
+    words = WORD_RE.findall(text.lower())
+    found = set()
+    negated = set()
+    for i, word in enumerate(words):
+        for status, vocabulary in STATUS_WORDS:
+            if word in vocabulary:
+                before = words[max(0, i - 2):i]
+                if NEGATIONS.intersection(before):
+                    negated.add(status)
+                elif status == 'Done' and PARTIAL_WORDS.intersection(before):
+                    found.add('In Progress')
+                elif status == 'Needs Testing' and TEST_RESULT_WORDS.intersection(words[max(0, i - 2):i + 3]):
+                    continue
+                else:
+                    found.add(status)
+    for marker, status in STATUS_EMOJI:
+        if marker in text and status not in negated:
+            found.add(status)
+    if negated & {'Done', 'In Progress'} and not found - {'Done', 'In Progress'}:
+        # "Not done", "not started", "not fixed yet"
+        found = {'Not Started'}
+    if 'Done' in found:
+        for status in UNFINISHED_STATUSES:
+            if status in found:
+                return status, ''
+    for status, _ in STATUS_WORDS:
+        if status in found:
+            return status, ''
+    return 'Not Started', text.strip()
+
+def _status_notes(source, note):
+    return f'{source} | Status: {note}' if note else source
+
+def _priority_from_text(text):
+    match = PRIORITY_WORDS_RE.search(text)
+    return PRIORITY_WORDS[match.group(1).lower()] if match else ''
+
+def _split_table_row(line):
+    return [cell.strip() for cell in line.strip().strip('|').split('|')]
+
+def extract_markdown_rows(path, relpath):
+    """Parse one Markdown document into task rows."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        lines = f.read().splitlines()
+
+    rows = []
+    headings = []  # stack of (level, text)
+    section_task = None
+    table_header = None
+    table_column = None
+    table_status = None
+
+    def category(depth=1):
+        return clean_text(headings[-depth][1]) if len(headings) >= depth else ''
+
+    def section_priority():
+        for level, text in reversed(headings):
+            priority = _priority_from_text(text)
+            if priority:
+                return priority
+        return ''
+
+    for lineno, line in enumerate(lines, 1):
+        source = f'Source: {relpath}:{lineno}'
+
+        heading = HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, heading.group(2)))
+            section_task = None
+            table_header = None
+            continue
+
+        field = FIELD_RE.match(line)
+        if field and headings:
+            name, value = field.groups()
+            if section_task is None:
+                # The heading above a task heading names its area
+                section_task = {
+                    'Category': category(2),
+                    'Priority': section_priority(),
+                    'Task': headings[-1][1],
+                    'Status': '',
+                    'StatusNotes': f'Source: {relpath}:{lineno - 1}',
+                }
+                rows.append(section_task)
+            if name == 'Status':
+                section_task['Status'], note = _status_from_marker(value)
+                section_task['StatusNotes'] = _status_notes(section_task['StatusNotes'], note)
+            else:
+                section_task['Priority'] = _priority_from_text(value) or value
+            continue
+
+        checkbox = CHECKBOX_RE.match(line)
+        if checkbox:
+            checked, text = checkbox.groups()
+            rows.append({
+                'Category': category(),
+                'Priority': section_priority(),
+                'Task': clean_text(text),
+                'Status': 'Done' if checked in 'xX' else 'Not Started',
+                'StatusNotes': source,
+            })
+            continue
+
+        if line.lstrip().startswith('|'):
+            cells = _split_table_row(line)
+            if table_header is None:
+                table_header = [clean_text(cell).lower() for cell in cells]
+                table_column = next(
+                    (table_header.index(name) for name in TASK_COLUMNS if name in table_header), None
+                )
+                table_status = table_header.index('status') if 'status' in table_header else None
+            elif TABLE_DIVIDER_RE.match(line.strip()):
+                continue
+            elif table_column is not None and table_column < len(cells) and cells[table_column]:
+                status = cells[table_status] if table_status is not None and table_status < len(cells) else ''
+                status, note = _status_from_marker(status) if status else ('Not Started', '')
+                rows.append({
+                    'Category': category(),
+                    'Priority': section_priority(),
+                    'Task': clean_text(cells[table_column]),
+                    'Status': status,
+                    'StatusNotes': _status_notes(source, note),
+                })
+            continue
+        table_header = None
+
+    default_category = Path(relpath).stem.replace('_', ' ').replace('-', ' ').title()
+    for row in rows:
+        row['Category'] = row['Category'] or default_category
+        row['Task'] = clean_text(row['Task'])
+    return [row for row in rows if row['Task']]
+
+def _parse_job(job):
+    path, relpath = job
+    return relpath, extract_markdown_rows(path, relpath)
+
+def _file_hash(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get('version') != PARSER_VERSION:
+        return {}
+    return cache.get('files', {})
+
+def collect_markdown_rows(paths, base_dir=BASE_DIR, cache_path=CACHE_PATH, max_workers=None):
+    """
+    Return (task rows, number of documents parsed) for every document in paths.
+
+    Documents whose mtime and size match the cache are not opened; documents
+    whose mtime changed but content hash did not are reused after hashing.
+    Everything else is parsed, in a process pool when there is enough work.
+    """
+    base_dir = Path(base_dir)
+    cache = _load_cache(cache_path)
+    fresh = {}
+    jobs = []
+
+    for path in paths:
+        path = Path(path)
+        relpath = path.relative_to(base_dir).as_posix() if path.is_absolute() else path.as_posix()
+        stat = path.stat()
+        entry = cache.get(relpath)
+        if entry and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            fresh[relpath] = entry
+            continue
+        digest = _file_hash(path)
+        if entry and entry['sha256'] == digest:
+            fresh[relpath] = dict(entry, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            continue
+        fresh[relpath] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': digest, 'rows': []}
+        jobs.append((str(path), relpath))
+
+    if len(jobs) >= MIN_PARALLEL_FILES and (max_workers or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(_parse_job, jobs))
+    else:
+        results = [_parse_job(job) for job in jobs]
+    for relpath, rows in results:
+        fresh[relpath]['rows'] = rows
+
+    if jobs or set(fresh) != set(cache):
+        with file_lock(cache_path):
+            with atomic_open(cache_path, lock=False) as f:
+                json.dump({'version': PARSER_VERSION, 'files': fresh}, f, ensure_ascii=False)
+
+    rows = []
+    for relpath in sorted(fresh):
+        rows.extend(fresh[relpath]['rows'])
+    return rows, len(jobs)
@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Byte-offset row index for the master task CSV.
+
+A sidecar ``<csv>.idx.json`` maps task ID -> (byte offset, length) of its
+record, so a task can be read by seeking straight to it and a handful of
+tasks can be patched or appended without parsing the whole file. Only the
+changed records are encoded; the bytes before the first change are copied
+as they are. Every change still lands through an atomic temp file and
+rename, so a crash or a concurrent reader never sees a half-written CSV.
+
+Usage:
+    python scripts/row_index.py get TASK-001 [CSV]
+    python scripts/row_index.py set TASK-001 "Column=Value" [...] [--csv CSV]
+    python scripts/row_index.py reindex [CSV]
+"""
+import csv
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+from atomic_io import ConcurrentModificationError, atomic_open, file_lock
+
+BASE_DIR = Path(__file__).parent.parent
+
+MASTER_CSV = BASE_DIR / 'docs' / 'off_axis_deals_master_tasks.csv'
+
+INDEX_VERSION = 1
+
+# Bytes copied per read when carrying the unchanged prefix over
+COPY_CHUNK = 1 << 20
+
+def index_path_for(csv_path):
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.name + '.idx.json')
+
+def _stat_of(path):
+    stat = Path(path).stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+def _iter_records(f):
+    """Yield (offset, raw bytes) for each CSV record, honouring quoted newlines."""
+    offset = f.tell()
+    parts = []
+    in_quotes = False
+    for line in iter(f.readline, b''):
+        parts.append(line)
+        if line.count(b'"') % 2:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            record = b''.join(parts)
+            yield offset, record
+            offset += len(record)
+            parts = []
+    if parts:
+        yield offset, b''.join(parts)
+
+def _parse_record(record):
+    return next(csv.reader(io.StringIO(record.decode('utf-8'), newline='')), [])
+
+def _record_id(record):
+    if not record.startswith(b'"'):
+        return record.split(b',', 1)[0].rstrip(b'\r\n').decode('utf-8').strip()
+    fields = _parse_record(record)
+    return fields[0].strip() if fields else ''
+
+def build_index(csv_path=MASTER_CSV):
+    """Scan the CSV once and write its row index."""
+    csv_path = Path(csv_path)
+    records = {}
+    duplicates = []
+    with open(csv_path, 'rb') as f:
+        header_records = _iter_records(f)
+        header = next(header_records, (0, b''))[1]
+        for offset, record in header_records:
+            task_id = _record_id(record)
+            if not task_id:
+                continue
+            if task_id in records:
+                duplicates.append(task_id)
+                continue
+            records[task_id] = [offset, len(record)]
+    index = {
+        'version': INDEX_VERSION,
+        'stat': _stat_of(csv_path),
+        'header': _parse_record(header),
+        'records': records,
+        'duplicates': sorted(set(duplicates)),
+    }
+    _save_index(index, csv_path)
+    return index
+
+def _save_index(index, csv_path):
+    with atomic_open(index_path_for(csv_path), lock=False) as f:
+        json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+
+def load_index(csv_path=MASTER_CSV):
+    """Load the row index, rebuilding it when the CSV changed since it was built."""
+    try:
+        with open(index_path_for(csv_path), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if index.get('version') == INDEX_VERSION and index.get('stat') == _stat_of(csv_path):
+            return index
+    except (FileNotFoundError, ValueError):
+        pass
+    return build_index(csv_path)
+
+def get_task(task_id, csv_path=MASTER_CSV, index=None):
+    """
+    Return one task's fields by seeking to its record, or None if absent.
+
+    Fields are a list aligned with index['header'], which may contain blank
+    or repeated names, so they are never keyed by column name.
+    """
+    index = index or load_index(csv_path)
+    span = index['records'].get(task_id)
+    if span is None:
+        return None
+    with open(csv_path, 'rb') as f:
+        f.seek(span[0])
+        return _parse_record(f.read(span[1]))
+
+def _encode_record(row, header, terminator):
+    if isinstance(row, dict):
+        if len(set(header)) != len(header):
+            raise ValueError("Header has blank or repeated column names; pass rows as field lists")
+        values = [row.get(name, '') or '' for name in header]
+    else:
+        values = row
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer, lineterminator=terminator).writerow(values)
+    return buffer.getvalue().encode('utf-8')
+
+def _rewrite(csv_path, start, data):
+    """Atomically replace csv_path with its first start bytes followed by data."""
+    with atomic_open(csv_path, mode='wb', lock=False) as dst:
+        # The source is closed before the replace, which Windows requires
+        with open(csv_path, 'rb') as src:
+            remaining = start
+            while remaining:
+                chunk = src.read(min(COPY_CHUNK, remaining))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                remaining -= len(chunk)
+        dst.write(data)
+
+def patch_tasks(updates, csv_path=MASTER_CSV, lock=True):
+    """
+    Replace the records of existing tasks.
+
+    updates maps task ID -> full row (list of fields, or a dict when the
+    header names are unique). Bytes before the first changed record are
+    copied unchanged and the rest is re-spliced, then the file is replaced
+    atomically. Returns the number of records patched. Pass lock=False when
+    the caller already holds file_lock(csv_path).
+    """
+    csv_path = Path(csv_path)
+    if lock:
+        with file_lock(csv_path):
+            return _patch_locked(updates, csv_path)
+    return _patch_locked(updates, csv_path)
+
+def _patch_locked(updates, csv_path):
+    index = load_index(csv_path)
+    missing = [task_id for task_id in updates if task_id not in index['records']]
+    if missing:
+        raise KeyError(f"Unknown task IDs: {', '.join(sorted(missing))}")
+    if not updates:
+        return 0
+
+    header = index['header']
+    spans = sorted((index['records'][task_id][0], index['records'][task_id][1], task_id) for task_id in updates)
+
+    with open(csv_path, 'rb') as f:
+        replacements = []
+        for offset, length, task_id in spans:
+            f.seek(offset)
+            old = f.read(length)
+            terminator = '\r\n' if old.endswith(b'\r\n') else '\n'
+            replacements.append((offset, length, task_id, _encode_record(updates[task_id], header, terminator)))
+        start = replacements[0][0]
+        f.seek(start)
+        tail = f.read()
+
+    out = []
+    cursor = start
+    shift = 0
+    new_spans = {}
+    for offset, length, task_id, new in replacements:
+        out.append(tail[cursor - start:offset - start])
+        out.append(new)
+        new_spans[task_id] = [offset + shift, len(new)]
+        shift += len(new) - length
+        cursor = offset + length
+    out.append(tail[cursor - start:])
+    _rewrite(csv_path, start, b''.join(out))
+
+    # The index is only touched once the new file is in place
+    _shift_offsets(index, replacements, start)
+    index['records'].update(new_spans)
+    index['stat'] = _stat_of(csv_path)
+    _save_index(index, csv_path)
+    return len(updates)
+
+def _shift_offsets(index, replacements, start):
+    """Move offsets of untouched records that sit after the first change."""
+    patched = {task_id for _, _, task_id, _ in replacements}
+    boundaries = []
+    shift = 0
+    for offset, length, _, new in replacements:
+        shift += len(new) - length
+        boundaries.append((offset, shift))
+    for task_id, span in index['records'].items():
+        if task_id in patched or span[0] < start:
+            continue
+        delta = 0
+        for offset, total in boundaries:
+            if span[0] > offset:
+                delta = total
+            else:
+                break
+        span[0] += delta
+
+def append_tasks(rows, csv_path=MASTER_CSV, lock=True):
+    """
+    Append new task rows at the end of the CSV and index them.
+
+    Rows whose ID is already indexed raise KeyError. The existing bytes are
+    copied unchanged ahead of the new records and the file is replaced
+    atomically. Returns the number of rows appended.
+    """
+    csv_path = Path(csv_path)
+    if lock:
+        with file_lock(csv_path):
+            return _append_locked(rows, csv_path)
+    return _append_locked(rows, csv_path)
+
+def _append_locked(rows, csv_path):
+    index = load_index(csv_path)
+    header = index['header']
+    records = []
+    for row in rows:
+        task_id = (row.get('ID', '') if isinstance(row, dict) else row[0]).strip()
+        if task_id in index['records'] or any(task_id and task_id == seen for seen, _ in records):
+            raise KeyError(f"Task ID already present: {task_id}")
+        records.append((task_id, row))
+
+    with open(csv_path, 'rb') as f:
+        first_line = f.readline()
+        terminator = '\r\n' if first_line.endswith(b'\r\n') else '\n'
+        end = f.seek(0, os.SEEK_END)
+        last = b''
+        if end:
+            f.seek(end - 1)
+            last = f.read(1)
+
+    out = []
+    position = end
+    if end and last != b'\n':
+        out.append(terminator.encode('ascii'))
+        position += len(terminator)
+    new_spans = {}
+    for task_id, row in records:
+        data = _encode_record(row, header, terminator)
+        out.append(data)
+        if task_id:
+            new_spans[task_id] = [position, len(data)]
+        position += len(data)
+    _rewrite(csv_path, end, b''.join(out))
+
+    index['records'].update(new_spans)
+    index['stat'] = _stat_of(csv_path)
+    _save_index(index, csv_path)
+    return len(records)
+
+def update_task(task_id, changes, csv_path=MASTER_CSV, expected=None):
+    """
+    Change named columns of one task, returning its updated fields.
+
+    Only the addressed cells change; every other field is written back as
+    read. If expected (a dict of column values read earlier) no longer matches
+    the stored record, ConcurrentModificationError is raised instead.
+    """
+    csv_path = Path(csv_path)
+    with file_lock(csv_path):
+        index = load_index(csv_path)
+        fields = get_task(task_id, csv_path, index)
+        if fields is None:
+            raise KeyError(f"Unknown task ID: {task_id}")
+        header = index['header']
+        fields.extend([''] * (len(header) - len(fields)))
+
+        def position(name):
+            if not name or name not in header:
+                raise KeyError(f"Unknown column: {name!r}")
+            return header.index(name)
+
+        if expected is not None and any(fields[position(k)] != v for k, v in expected.items()):
+            raise ConcurrentModificationError(f"{task_id} was modified by another writer")
+        for name, value in changes.items():
+            fields[position(name)] = value
+        patch_tasks({task_id: fields}, csv_path, lock=False)
+    return fields
+
+def main():
+    args = sys.argv[1:]
+    command = args.pop(0) if args else ''
+
+    if command == 'get' and args:
+        csv_path = Path(args[1]) if len(args) > 1 else MASTER_CSV
+        index = load_index(csv_path)
+        fields = get_task(args[0], csv_path, index)
+        if fields is None:
+            print(f"⚠️  {args[0]} not found")
+            sys.exit(1)
+        for i, value in enumerate(fields):
+            name = index['header'][i] if i < len(index['header']) else ''
+            print(f"{name or f'(column {i + 1})'}: {value}")
+    elif command == 'set' and len(args) >= 2:
+        task_id = args.pop(0)
+        csv_path = MASTER_CSV
+        changes = {}
+        while args:
+            arg = args.pop(0)
+            if arg == '--csv' and args:
+                csv_path = Path(args.pop(0))
+            elif '=' in arg:
+                name, value = arg.split('=', 1)
+                changes[name] = value
+        update_task(task_id, changes, csv_path)
+        print(f"✓ Updated {task_id} ({', '.join(changes)})")
+    elif command == 'reindex':
+        csv_path = Path(args[0]) if args else MASTER_CSV
+        index = build_index(csv_path)
+        print(f"✓ Indexed {len(index['records'])} tasks in {csv_path}")
+        for task_id in index['duplicates']:
+            print(f"⚠️  Duplicate ID {task_id}; only the first record is indexed")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Exact deduplication with bounded memory for very large consolidations.
+
+Each signature is reduced to a 64-bit hash. A Bloom filter over those hashes
+is the only per-task structure kept in memory: a miss proves the task is new,
+and only a hit costs a lookup in an on-disk SQLite store, where the full
+signature is compared so hash collisions never merge distinct tasks. Merged
+task state lives in the store and is streamed back in first-seen order.
+"""
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import tempfile
+
+# Target false-positive rate of the Bloom filter
+BLOOM_FALSE_POSITIVE_RATE = 0.01
+
+# Sizing used when the number of input tasks is not known up front
+DEFAULT_EXPECTED_TASKS = 10_000_000
+
+# Pending inserts/updates written to SQLite per transaction
+COMMIT_EVERY = 50_000
+
+def signature_hash(signature):
+    """Return a signed 64-bit hash of a signature (SQLite INTEGER range)."""
+    digest = hashlib.blake2b(signature.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+class BloomFilter:
+    """Bit-array Bloom filter over 64-bit integer hashes."""
+
+    def __init__(self, expected_items, false_positive_rate=BLOOM_FALSE_POSITIVE_RATE):
+        expected_items = max(1, expected_items)
+        bits = -expected_items * math.log(false_positive_rate) / (math.log(2) ** 2)
+        self.size = max(64, int(bits))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing from the two 32-bit halves of the 64-bit hash
+        value &= 0xFFFFFFFFFFFFFFFF
+        h1 = value & 0xFFFFFFFF
+        h2 = (value >> 32) | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, value):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
+
+def deduplicate_spilling(tasks, signature, merge, expected_tasks=None, tmp_dir=None):
+    """
+    Yield unique tasks in first-seen order, merging duplicates with merge(existing, task).
+
+    signature(task) returns the exact dedupe key. Memory use is the Bloom
+    filter (about 1.2 bytes per task at the default rate) plus SQLite's page
+    cache, independent of task sizes.
+    """
+    if expected_tasks is None:
+        expected_tasks = len(tasks) if hasattr(tasks, '__len__') else DEFAULT_EXPECTED_TASKS
+    bloom = BloomFilter(expected_tasks)
+
+    fd, db_path = tempfile.mkstemp(prefix='dedupe-', suffix='.sqlite', dir=tmp_dir)
+    os.close(fd)
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute('PRAGMA journal_mode=OFF')
+        conn.execute('PRAGMA synchronous=OFF')
+        conn.execute(
+            'CREATE TABLE tasks (seq INTEGER PRIMARY KEY, sig_hash INTEGER NOT NULL,'
+            ' signature TEXT NOT NULL, task TEXT NOT NULL)'
+        )
+        conn.execute('CREATE INDEX tasks_sig_hash ON tasks (sig_hash)')
+
+        pending = 0
+        for task in tasks:
+            key = signature(task)
+            h = signature_hash(key)
+            existing = None
+            if h in bloom:
+                for seq, stored_key, stored in conn.execute(
+                    'SELECT seq, signature, task FROM tasks WHERE sig_hash = ?', (h,)
+                ):
+                    if stored_key == key:
+                        existing = (seq, json.loads(stored))
+                        break
+            if existing is None:
+                conn.execute(
+                    'INSERT INTO tasks (sig_hash, signature, task) VALUES (?, ?, ?)',
+                    (h, key, json.dumps(task, ensure_ascii=False)),
+                )
+                bloom.add(h)
+            else:
+                seq, merged = existing
+                merge(merged, task)
+                conn.execute('UPDATE tasks SET task = ? WHERE seq = ?', (json.dumps(merged, ensure_ascii=False), seq))
+            pending += 1
+            if pending >= COMMIT_EVERY:
+                conn.commit()
+                pending = 0
+        conn.commit()
+
+        for (stored,) in conn.execute('SELECT task FROM tasks ORDER BY seq'):
+            yield json.loads(stored)
+    finally:
+        conn.close()
+        try:
+            os.unlink(db_path)
+        except OSError:
+            pass
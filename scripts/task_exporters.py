@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Fan-out export of master task rows to CSV, JSON Lines and Markdown checklists.
+
+Rows are read once and handed, in batches, to every format's writer in
+turn through a buffered file handle. The formatting is CPU-bound Python, so
+it stays in one thread: writer threads only added GIL contention and made
+the fan-out slower than writing each format on its own. The outputs land
+together: if any format fails, none of them replaces its file.
+"""
+import csv
+import itertools
+import json
+from contextlib import ExitStack
+from pathlib import Path
+
+from atomic_io import atomic_open
+from external_sort import STATUS_ORDER, ExternalSorter
+
+# Rows handed to each writer at a time
+BATCH_SIZE = 1000
+
+# File buffer size for each writer
+WRITE_BUFFER = 1 << 16
+
+# Statuses rendered as checked boxes
+DONE_STATUSES = {'Passed', "Won't Do"}
+
+class ExportError(Exception):
+    """Raised when a format failed; no output file was replaced."""
+
+def _open(path, on_commit=None):
+    return atomic_open(path, buffering=WRITE_BUFFER, on_commit=on_commit)
+
+class _Writer:
+    """Base for format writers: write() takes batches of rows, finish() ends the file."""
+
+    def write(self, rows):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class CsvWriter(_Writer):
+    """Write rows to an open CSV file."""
+
+    def __init__(self, f, columns):
+        self.writer = csv.DictWriter(f, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+class JsonlWriter(_Writer):
+    """Write rows to an open JSON Lines file, one object per task."""
+
+    def __init__(self, f, columns):
+        self.f = f
+        self.columns = columns
+        self.encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def write(self, rows):
+        columns = self.columns
+        self.f.write(''.join(
+            self.encode({col: row.get(col, '') for col in columns}) + '\n' for row in rows
+        ))
+
+def _status_sort_key(status):
+    if status in STATUS_ORDER:
+        return (STATUS_ORDER.index(status), '')
+    return (len(STATUS_ORDER), status)
+
+def _checklist_key(row):
+    return (row.get('Feature / Area') or 'General', _status_sort_key(row.get('Status') or 'Not Started'))
+
+class MarkdownWriter(_Writer):
+    """
+    Write a Markdown checklist grouped by feature and then status.
+
+    Rows are regrouped with a stable external sort, so sections stream out
+    without holding every row in memory and keep the input order within.
+    """
+
+    def __init__(self, f, columns):
+        self.f = f
+        self.sorter = ExternalSorter(key=_checklist_key)
+
+    def write(self, rows):
+        self.sorter.extend(rows)
+
+    def finish(self):
+        f = self.f
+        f.write('# Off Axis Deals – Master Task Checklist\n')
+        feature = status = None
+        for row in self.sorter.sorted():
+            row_feature = row.get('Feature / Area') or 'General'
+            row_status = row.get('Status') or 'Not Started'
+            if row_feature != feature:
+                feature, status = row_feature, None
+                f.write(f'\n## {feature}\n')
+            if row_status != status:
+                status = row_status
+                f.write(f'\n### {status}\n\n')
+            box = 'x' if status in DONE_STATUSES else ' '
+            line = f"- [{box}] **{row.get('ID', '')}** {row.get('Description', '')}"
+            route = row.get('Page / Route', '')
+            if route:
+                line += f' (`{route}`)'
+            priority = row.get('Priority', '')
+            if priority:
+                line += f' — {priority}'
+            f.write(line.replace('\n', ' ') + '\n')
+
+    def close(self):
+        self.sorter.close()
+
+# Registered export formats: name -> (writer class, file suffix)
+EXPORTERS = {
+    'csv': (CsvWriter, '.csv'),
+    'jsonl': (JsonlWriter, '.jsonl'),
+    'markdown': (MarkdownWriter, '_checklist.md'),
+}
+
+def export_tasks(rows, base_path, columns, formats=None, on_commit=None):
+    """
+    Export rows to every requested format in a single pass.
+
+    base_path is the CSV output path; other formats are written next to it
+    using the suffixes in EXPORTERS. Returns a dict of format -> path written.
+    If any format fails ExportError is raised and every output keeps its
+    previous contents, so the formats never disagree. on_commit is passed to
+    atomic_open for base_path, to run under its lock once it is replaced.
+    """
+    base_path = Path(base_path)
+    stem = base_path.with_suffix('')
+    formats = list(formats or EXPORTERS)
+
+    paths = {}
+    for name in formats:
+        suffix = EXPORTERS[name][1]
+        paths[name] = base_path if suffix == base_path.suffix else stem.parent / f'{stem.name}{suffix}'
+
+    with ExitStack() as outputs:
+        # Temp files are committed only when the block exits without an error
+        writers = {}
+        for name in formats:
+            f = outputs.enter_context(_open(paths[name], on_commit if paths[name] == base_path else None))
+            writers[name] = outputs.enter_context(EXPORTERS[name][0](f, columns))
+
+        def each_writer(method, *args):
+            for name, writer in writers.items():
+                try:
+                    getattr(writer, method)(*args)
+                except Exception as e:
+                    raise ExportError(f"Export failed, no outputs written: {name} ({paths[name]}): {e}") from e
+
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, BATCH_SIZE))
+            if not batch:
+                break
+            each_writer('write', batch)
+        each_writer('finish')
+    return paths
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Stable task ID allocation backed by a persistent content-fingerprint map.
+
+docs/task_ids.json maps a fingerprint of each task's content (description
+and route, normalised the way deduplication compares them) to the ID it was
+given, plus the next free number. The same task therefore keeps its ID
+across runs regardless of input order, and new tasks get fresh numbers.
+Allocation happens under a file lock, so concurrent writers always receive
+disjoint blocks of IDs; a run that assigns many IDs holds the map open once
+(see open_registry) rather than reloading and rewriting it per batch.
+
+The first time the map is needed it is seeded from the master CSV, keeping
+the IDs already published there. The map is committed alongside the
+master CSV so every checkout hands out the same IDs.
+
+Usage:
+    python scripts/task_ids.py check [CSV ...]
+    python scripts/task_ids.py assign CSV
+    python scripts/task_ids.py reserve N
+"""
+import csv
+import hashlib
+import json
+import re
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from atomic_io import atomic_open, file_lock, update_csv
+from task_shards import sync_shards
+
+BASE_DIR = Path(__file__).parent.parent
+
+MASTER_CSV = BASE_DIR / 'docs' / 'off_axis_deals_master_tasks.csv'
+REGISTRY_PATH = BASE_DIR / 'docs' / 'task_ids.json'
+
+ID_PREFIX = 'TASK-'
+ID_WIDTH = 3
+
+# Task CSVs scanned by `check` when none are given
+DEFAULT_SOURCES = sorted((BASE_DIR / 'docs').glob('*.csv'))
+
+_ID_RE = re.compile(rf'^{re.escape(ID_PREFIX)}(\d+)$')
+
+def format_id(number):
+    return f"{ID_PREFIX}{number:0{ID_WIDTH}d}"
+
+def id_number(task_id):
+    """Return the numeric part of a well-formed task ID, or None."""
+    match = _ID_RE.match((task_id or '').strip())
+    return int(match.group(1)) if match else None
+
+def content_key(description, route=''):
+    """Normalise the fields that identify a task; deduplication compares the same key."""
+    desc_key = (description or '').lower().strip()[:100]
+    route_key = (route or '').lower().strip()
+    return f"{desc_key}|{route_key}"
+
+def task_fingerprint(description, route=''):
+    """Hash a task's content_key into the fingerprint stored in the ID map."""
+    return hashlib.blake2b(content_key(description, route).encode('utf-8'), digest_size=12).hexdigest()
+
+def row_fingerprint(row):
+    """Fingerprint a CSV row given as a dict keyed by the master columns."""
+    return task_fingerprint(row.get('Description', ''), row.get('Page / Route', ''))
+
+def _read_csv(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.DictReader(f))
+
+class TaskIdRegistry:
+    """In-memory view of the fingerprint -> ID map; use open_registry() to change it safely."""
+
+    def __init__(self, ids=None, next_number=1):
+        self.ids = dict(ids or {})
+        self.owners = {task_id: fp for fp, task_id in self.ids.items()}
+        self.next_number = next_number
+
+    @classmethod
+    def load(cls, path=REGISTRY_PATH):
+        """Load the stored map, or None if there is none yet."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        return cls(data.get('ids'), data.get('next', 1))
+
+    def save(self, path=REGISTRY_PATH):
+        data = {'next': self.next_number, 'ids': self.ids}
+        with atomic_open(path, lock=False) as f:
+            json.dump(data, f, ensure_ascii=False, indent=0, sort_keys=True)
+
+    def claim(self, fingerprint, preferred=None):
+        """
+        Return the ID for fingerprint, registering one if it is new.
+
+        A new fingerprint takes preferred when that is a well-formed ID no
+        other content owns; otherwise it gets the next free number.
+        """
+        task_id = self.ids.get(fingerprint)
+        if task_id:
+            return task_id
+        number = id_number(preferred)
+        if number is not None and preferred.strip() not in self.owners:
+            task_id = preferred.strip()
+            self.next_number = max(self.next_number, number + 1)
+        else:
+            task_id = self.reserve(1)[0]
+        self.ids[fingerprint] = task_id
+        self.owners[task_id] = fingerprint
+        return task_id
+
+    def reserve(self, count):
+        """Take a block of count unused IDs without binding them to content."""
+        block = []
+        while len(block) < count:
+            task_id = format_id(self.next_number)
+            self.next_number += 1
+            if task_id not in self.owners:
+                block.append(task_id)
+        return block
+
+def _seeded(path, seed_csv):
+    registry = TaskIdRegistry.load(path)
+    if registry is None:
+        registry = TaskIdRegistry()
+        if seed_csv and Path(seed_csv).exists():
+            for row in _read_csv(seed_csv):
+                registry.claim(row_fingerprint(row), row.get('ID'))
+    return registry
+
+@contextmanager
+def open_registry(path=REGISTRY_PATH, seed_csv=MASTER_CSV):
+    """
+    Hold the ID map under its lock for the duration of the block.
+
+    The map is loaded once and, if the block claimed or reserved anything,
+    saved once before the lock is released, so concurrent callers never hand
+    out the same ID twice. Nothing is saved if the block raises.
+    """
+    with file_lock(path):
+        registry = _seeded(path, seed_csv)
+        before = (registry.next_number, len(registry.ids))
+        yield registry
+        if not Path(path).exists() or (registry.next_number, len(registry.ids)) != before:
+            registry.save(path)
+
+def allocate(items, path=REGISTRY_PATH, seed_csv=MASTER_CSV):
+    """
+    Return IDs for (fingerprint, preferred ID or None) items in one locked step.
+
+    Known fingerprints get their stored ID; new ones are registered.
+    """
+    with open_registry(path, seed_csv) as registry:
+        return [registry.claim(fp, preferred) for fp, preferred in items]
+
+def assign_ids(fingerprints, path=REGISTRY_PATH, seed_csv=MASTER_CSV):
+    """Return stable IDs for content fingerprints, allocating new ones as needed."""
+    return allocate(((fp, None) for fp in fingerprints), path, seed_csv)
+
+def reserve_ids(count, path=REGISTRY_PATH, seed_csv=MASTER_CSV):
+    """Atomically take a block of count fresh IDs for a writer to hand out itself."""
+    with open_registry(path, seed_csv) as registry:
+        return registry.reserve(count)
+
+def find_collisions(sources, path=REGISTRY_PATH):
+    """
+    Scan every source in one pass and report IDs that mean different tasks.
+
+    Returns a list of messages: IDs used for different content within or
+    across sources, and IDs whose content disagrees with the stored map.
+    """
+    registry = TaskIdRegistry.load(path) or TaskIdRegistry()
+    seen = {}  # task ID -> {fingerprint: first 'file:line'}
+    problems = []
+    for source in sources:
+        source = Path(source)
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            reader.fieldnames  # read the header so line_num counts from it
+            records = []
+            line = reader.line_num + 1
+            for row in reader:
+                # Records can span lines; report the line each one starts on
+                records.append((line, row))
+                line = reader.line_num + 1
+        for line, row in records:
+            task_id = (row.get('ID') or '').strip()
+            if not task_id:
+                continue
+            fp = row_fingerprint(row)
+            where = f"{source.name}:{line}"
+            uses = seen.setdefault(task_id, {})
+            if fp in uses:
+                continue
+            if uses:
+                problems.append(f"{task_id} at {where} is a different task than at {next(iter(uses.values()))}")
+            elif task_id in registry.owners and registry.owners[task_id] != fp:
+                registered = registry.ids.get(fp)
+                hint = f"registered as {registered}" if registered else "not registered"
+                problems.append(f"{task_id} at {where} is not the task registered under that ID (content {hint})")
+            uses[fp] = where
+    return problems
+
+def assign_csv(csv_path, path=REGISTRY_PATH):
+    """
+    Rewrite a task CSV's IDs from the map, returning the number of IDs changed.
+
+    Rows keep their ID unless the map assigns their content a different one
+    or the ID belongs to other content, in which case they get a fresh one.
+    """
+    changed = 0
+
+    def transform(rows):
+        nonlocal changed
+        header = rows[0]
+        id_col, desc_col, route_col = (header.index(name) for name in ('ID', 'Description', 'Page / Route'))
+        items = [
+            (task_fingerprint(row[desc_col], row[route_col]), row[id_col])
+            for row in rows[1:]
+        ]
+        ids = allocate(items, path)
+        changed = 0
+        for row, task_id in zip(rows[1:], ids):
+            if row[id_col] != task_id:
+                row[id_col] = task_id
+                changed += 1
+        return rows
+
+    update_csv(csv_path, transform, on_commit=sync_shards)
+    return changed
+
+def main():
+    args = sys.argv[1:]
+    command = args.pop(0) if args else ''
+
+    if command == 'check':
+        sources = [Path(arg) for arg in args] or DEFAULT_SOURCES
+        problems = find_collisions(sources)
+        for problem in problems:
+            print(f"⚠️  {problem}")
+        print(f"✓ Checked {len(sources)} source(s); {len(problems)} collision(s)")
+        sys.exit(1 if problems else 0)
+    elif command == 'assign' and args:
+        changed = assign_csv(Path(args[0]))
+        print(f"✓ Assigned IDs in {args[0]}; {changed} changed")
+    elif command == 'reserve' and args:
+        for task_id in reserve_ids(int(args[0])):
+            print(task_id)
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained count rollups over the master task list.
+
+Counts are kept per (Feature / Area, Status, Priority, Environment) group in
+a sidecar JSON file next to the master CSV. Pipeline stages apply row deltas
+as they add or change tasks, and queries aggregate over the stored groups
+without reading any task rows.
+
+Usage:
+    python scripts/task_rollups.py [--by COLUMN[,COLUMN...]] [COLUMN=VALUE ...]
+
+Example (High tasks still Not Started, per feature area):
+    python scripts/task_rollups.py --by "Feature / Area" Status="Not Started" Priority=High
+"""
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from atomic_io import atomic_open, file_lock, file_version, read_csv_rows
+
+BASE_DIR = Path(__file__).parent.parent
+
+MASTER_CSV = BASE_DIR / 'docs' / 'off_axis_deals_master_tasks.csv'
+
+ROLLUP_DIMENSIONS = ('Feature / Area', 'Status', 'Priority', 'Environment')
+
+def rollup_path_for(csv_path):
+    """Sidecar location of the rollup for a master CSV."""
+    return Path(csv_path).with_suffix('.rollup.json')
+
+def _as_dict(row, header):
+    if row is None or isinstance(row, dict):
+        return row
+    return {name: (row[i] if i < len(row) else '') for i, name in enumerate(header)}
+
+class TaskRollup:
+    """Count aggregates keyed by ROLLUP_DIMENSIONS."""
+
+    def __init__(self, counts=None, source_version=None, source_stat=None):
+        self.counts = defaultdict(int, counts or {})
+        self.source_version = source_version
+        self.source_stat = source_stat
+
+    def _group(self, row):
+        return tuple((row.get(dim) or '').strip() for dim in ROLLUP_DIMENSIONS)
+
+    def apply(self, old_row=None, new_row=None, header=None):
+        """
+        Apply one row change: insert (old_row None), delete (new_row None) or update.
+
+        Rows may be dicts or lists; lists need the CSV header.
+        """
+        old_row = _as_dict(old_row, header)
+        new_row = _as_dict(new_row, header)
+        if old_row is not None:
+            group = self._group(old_row)
+            self.counts[group] -= 1
+            if self.counts[group] <= 0:
+                del self.counts[group]
+        if new_row is not None:
+            self.counts[self._group(new_row)] += 1
+
+    def add_rows(self, rows, header=None):
+        for row in rows:
+            self.apply(None, row, header)
+
+    @classmethod
+    def from_rows(cls, rows, header=None, source_version=None):
+        rollup = cls(source_version=source_version)
+        rollup.add_rows(rows, header)
+        return rollup
+
+    def query(self, group_by=(), filters=None):
+        """
+        Return {group values tuple: count} for groups matching filters.
+
+        group_by lists dimensions to keep; filters maps dimensions to required
+        values. Dimensions may be given by name or in underscore form
+        (e.g. 'feature_area'). Runs in O(groups), never touching task rows.
+        """
+        wanted = {ROLLUP_DIMENSIONS.index(_dimension_for(k)): v for k, v in (filters or {}).items()}
+        positions = [ROLLUP_DIMENSIONS.index(_dimension_for(dim)) for dim in group_by]
+        result = defaultdict(int)
+        for group, count in self.counts.items():
+            if all(group[i] == value for i, value in wanted.items()):
+                result[tuple(group[i] for i in positions)] += count
+        return dict(result)
+
+    def total(self, filters=None):
+        return self.query((), filters).get((), 0)
+
+    def save(self, path, source_version=None, csv_path=None):
+        """Persist the rollup, recording the master file version (and stat) it describes."""
+        if source_version is not None:
+            self.source_version = source_version
+        if csv_path is not None:
+            self.source_stat = _stat_of(csv_path)
+        data = {
+            'dimensions': list(ROLLUP_DIMENSIONS),
+            'source_version': self.source_version,
+            'source_stat': self.source_stat,
+            'counts': [list(group) + [count] for group, count in sorted(self.counts.items())],
+        }
+        with atomic_open(path) as f:
+            json.dump(data, f, ensure_ascii=False, indent=0)
+
+    def save_for(self, csv_path):
+        """
+        Save next to csv_path, stamped with the CSV's current version and stat.
+
+        Call while holding file_lock(csv_path) (e.g. from atomic_open's
+        on_commit) so the stamp describes the bytes this stage wrote.
+        """
+        self.save(rollup_path_for(csv_path), file_version(csv_path), csv_path=csv_path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a stored rollup, or None if missing or built with other dimensions."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if data.get('dimensions') != list(ROLLUP_DIMENSIONS):
+            return None
+        counts = {tuple(entry[:-1]): entry[-1] for entry in data.get('counts', [])}
+        return cls(counts, data.get('source_version'), data.get('source_stat'))
+
+def _stat_of(path):
+    stat = Path(path).stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+def _dimension_for(name):
+    """Resolve a dimension by exact name or by its underscore keyword form."""
+    if name in ROLLUP_DIMENSIONS:
+        return name
+    for dim in ROLLUP_DIMENSIONS:
+        if name.lower() == dim.replace(' / ', '_').replace(' ', '_').lower():
+            return dim
+    raise KeyError(f"Unknown rollup dimension: {name}")
+
+def load_rollup(csv_path=MASTER_CSV):
+    """
+    Load the rollup for a master CSV, rebuilding it if it is missing or stale.
+
+    The stored rollup is trusted only when it was saved for the CSV's current
+    version, so edits made outside the pipeline never leave wrong counts. A
+    matching mtime and size skips even hashing the CSV.
+    """
+    rollup = TaskRollup.load(rollup_path_for(csv_path))
+    if rollup is not None and rollup.source_stat == _stat_of(csv_path):
+        return rollup
+    # The version, stat and counts must all come from the same bytes
+    with file_lock(csv_path):
+        return _load_rollup_locked(csv_path)
+
+def _load_rollup_locked(csv_path):
+    path = rollup_path_for(csv_path)
+    rollup = TaskRollup.load(path)
+    if rollup is not None:
+        if rollup.source_stat == _stat_of(csv_path):
+            return rollup
+        if rollup.source_version == file_version(csv_path):
+            rollup.save(path, csv_path=csv_path)
+            return rollup
+    rows, version = read_csv_rows(csv_path)
+    rollup = TaskRollup.from_rows(rows[1:], rows[0] if rows else [], source_version=version)
+    rollup.save(path, csv_path=csv_path)
+    return rollup
+
+def update_rollup(csv_path, changes, header, old_version):
+    """
+    Apply (old_row, new_row) changes made by a stage that rewrote csv_path.
+
+    Call while holding file_lock(csv_path), right after the write (pass it as
+    the writer's on_commit), so the rollup is stamped with the written bytes.
+    If the stored rollup does not describe old_version it is rebuilt from the
+    CSV instead, which already includes the changes.
+    """
+    rollup = TaskRollup.load(rollup_path_for(csv_path))
+    if rollup is None or rollup.source_version != old_version:
+        _load_rollup_locked(csv_path)
+        return
+    for old_row, new_row in changes:
+        rollup.apply(old_row, new_row, header)
+    rollup.save_for(csv_path)
+
+def main():
+    args = sys.argv[1:]
+    group_by = []
+    filters = {}
+    while args:
+        arg = args.pop(0)
+        if arg == '--by' and args:
+            group_by = [dim.strip() for dim in args.pop(0).split(',')]
+        elif '=' in arg:
+            name, value = arg.split('=', 1)
+            filters[name.strip()] = value
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    result = load_rollup().query(group_by, filters)
+    for key, count in sorted(result.items(), key=lambda item: (-item[1], item[0])):
+        label = ' | '.join(key) if key else 'Total'
+        print(f"{count:>6}  {label}")
+
+if __name__ == '__main__':
+    main()
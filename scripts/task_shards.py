@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Sharded layout for the master task list: one CSV per Feature / Area.
+
+The master CSV stays the source of truth and the shards are a partition of
+it. A manifest records each shard's file, row count and content hash, plus
+the master version it was split from. Every writer of the master re-splits
+it under the master's lock (see sync_shards), rewriting only shards whose
+content changed; readers re-split first if the master moved on anyway.
+
+Stages that transform tasks run per shard in a process pool, then write
+their results back to the master, rollup and shards in one locked commit.
+A merged single-CSV view can be produced on demand for consumers that still
+want one file.
+
+Rows are kept as raw field lists against the master header, so blank or
+repeated column names (the master ends in 'Notes,,') survive every stage.
+
+Usage:
+    python scripts/task_shards.py split [CSV]
+    python scripts/task_shards.py enrich
+    python scripts/task_shards.py validate
+    python scripts/task_shards.py merge OUTPUT_CSV
+"""
+import csv
+import hashlib
+import io
+import json
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from atomic_io import (
+    ConcurrentModificationError, atomic_open, file_lock, file_version, read_csv_rows, write_csv_rows,
+)
+from external_sort import external_sort, positional_sort_key
+from instruction_cache import InstructionCache
+from task_rollups import update_rollup
+
+BASE_DIR = Path(__file__).parent.parent
+
+MASTER_CSV = BASE_DIR / 'docs' / 'off_axis_deals_master_tasks.csv'
+SHARD_DIR = BASE_DIR / 'docs' / 'task_shards'
+MANIFEST_FILE = 'manifest.json'
+
+# 'feature' gives one shard per Feature / Area; 'hash' spreads areas over HASH_BUCKETS files
+SHARD_BY = 'feature'
+HASH_BUCKETS = 16
+
+VALID_PRIORITIES = {'High', 'Medium', 'Low'}
+
+def _cell(row, position):
+    return row[position] if position is not None and position < len(row) else ''
+
+def _position(columns, name):
+    return columns.index(name) if name in columns else None
+
+def shard_name(feature, shard_by=SHARD_BY):
+    """Return the shard for a Feature / Area value."""
+    feature = (feature or '').strip() or 'General'
+    if shard_by == 'hash':
+        bucket = int.from_bytes(hashlib.blake2b(feature.lower().encode('utf-8'), digest_size=4).digest(), 'big')
+        return f'bucket-{bucket % HASH_BUCKETS:02d}'
+    slug = re.sub(r'[^a-z0-9]+', '-', feature.lower()).strip('-') or 'general'
+    # Different areas can slug alike; a short hash keeps their files apart
+    return f"{slug[:60]}-{hashlib.blake2b(feature.encode('utf-8'), digest_size=3).hexdigest()}"
+
+def _csv_bytes(rows, columns):
+    buffer = io.StringIO(newline='')
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    writer.writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+def load_manifest(shard_dir=SHARD_DIR):
+    try:
+        with open(Path(shard_dir) / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'columns': [], 'shards': {}}
+
+def has_shards(shard_dir=SHARD_DIR):
+    return (Path(shard_dir) / MANIFEST_FILE).exists()
+
+def _save_manifest(manifest, shard_dir):
+    with atomic_open(Path(shard_dir) / MANIFEST_FILE, lock=False) as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+def read_shard(shard_dir, entry):
+    """Return a shard's rows as field lists, without the header."""
+    with open(Path(shard_dir) / entry['file'], 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        return list(reader)
+
+def _write_shard(shard_dir, name, rows, columns, manifest):
+    """Write one shard if its content changed; returns True when the file was rewritten."""
+    data = _csv_bytes(rows, columns)
+    digest = hashlib.sha256(data).hexdigest()
+    entry = manifest['shards'].get(name)
+    if entry and entry['sha256'] == digest and (Path(shard_dir) / entry['file']).exists():
+        return False
+    with atomic_open(Path(shard_dir) / f'{name}.csv', mode='wb', lock=False) as f:
+        f.write(data)
+    manifest['shards'][name] = {'file': f'{name}.csv', 'rows': len(rows), 'sha256': digest}
+    return True
+
+def write_shards(rows, columns, shard_dir=SHARD_DIR, shard_by=SHARD_BY, source=None, source_version=None):
+    """
+    Partition rows (field lists aligned with columns) into shards, rewriting
+    only shards whose content changed.
+
+    source and source_version name the master file and version the rows
+    came from. Returns (rewritten, unchanged, removed) shard counts.
+    """
+    shard_dir = Path(shard_dir)
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    feature = _position(list(columns), 'Feature / Area')
+    groups = {}
+    for row in rows:
+        groups.setdefault(shard_name(_cell(row, feature), shard_by), []).append(row)
+
+    with file_lock(shard_dir / MANIFEST_FILE):
+        manifest = load_manifest(shard_dir)
+        if manifest['columns'] != list(columns) or manifest.get('shard_by', SHARD_BY) != shard_by:
+            # Every shard's header or membership changes
+            manifest = {'columns': list(columns), 'shards': {}}
+        manifest['shard_by'] = shard_by
+        manifest['source'] = source
+        manifest['source_version'] = source_version
+        rewritten = sum(_write_shard(shard_dir, name, group, columns, manifest) for name, group in groups.items())
+
+        removed = 0
+        for name in list(manifest['shards']):
+            if name not in groups:
+                (shard_dir / manifest['shards'].pop(name)['file']).unlink(missing_ok=True)
+                removed += 1
+        _save_manifest(manifest, shard_dir)
+    return rewritten, len(groups) - rewritten, removed
+
+def sync_shards(csv_path=MASTER_CSV, shard_dir=SHARD_DIR):
+    """
+    Re-split csv_path into its shards after a writer changed it.
+
+    Call while holding file_lock(csv_path), e.g. from atomic_open's
+    on_commit, so the shards match the bytes just written. Does nothing and
+    returns None unless the shards were split from csv_path; otherwise
+    returns write_shards' counts.
+    """
+    shard_dir = Path(shard_dir)
+    if not has_shards(shard_dir):
+        return None
+    manifest = load_manifest(shard_dir)
+    if manifest.get('source') != Path(csv_path).name:
+        return None
+    rows, version = read_csv_rows(csv_path)
+    header, rows = (rows[0], rows[1:]) if rows else ([], [])
+    return write_shards(rows, header, shard_dir, manifest.get('shard_by', SHARD_BY), Path(csv_path).name, version)
+
+def ensure_current(csv_path=MASTER_CSV, shard_dir=SHARD_DIR):
+    """Re-split the shards if the master changed without updating them."""
+    with file_lock(csv_path):
+        if load_manifest(shard_dir).get('source_version') != file_version(csv_path):
+            sync_shards(csv_path, shard_dir)
+
+def _run_stage(job):
+    stage, columns, rows = job
+    return stage(columns, rows)
+
+def process_shards(stage, csv_path=MASTER_CSV, shard_dir=SHARD_DIR, max_workers=None, write=True):
+    """
+    Run stage(columns, rows) -> result on every shard in a process pool.
+
+    Shards are read from the master, grouped the way the shard layout
+    groups them. With write=True the stage returns the shard's rows, one
+    for one; the master is rewritten once with every shard's result, and
+    the rollup and the shards that changed are updated under the same lock.
+    Returns the number of shards rewritten. With write=False the results
+    are returned per shard. stage must be a module-level function so it can
+    be sent to workers.
+    """
+    rows, version = read_csv_rows(csv_path)
+    columns, rows = (rows[0], rows[1:]) if rows else ([], [])
+    shard_by = load_manifest(shard_dir).get('shard_by', SHARD_BY)
+    feature = _position(columns, 'Feature / Area')
+    groups = {}  # shard name -> master row positions
+    for position, row in enumerate(rows):
+        groups.setdefault(shard_name(_cell(row, feature), shard_by), []).append(position)
+    names = sorted(groups)
+    jobs = [(stage, columns, [rows[i] for i in groups[name]]) for name in names]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        results = dict(zip(names, pool.map(_run_stage, jobs)))
+    if not write:
+        return results
+
+    changes = []
+    for name, new_rows in results.items():
+        positions = groups[name]
+        if len(new_rows) != len(positions):
+            raise ValueError(f"{stage.__name__} returned {len(new_rows)} rows for shard {name}, expected {len(positions)}")
+        for position, new_row in zip(positions, new_rows):
+            if new_row != rows[position]:
+                changes.append((rows[position], new_row))
+                rows[position] = new_row
+    if not changes:
+        return 0
+
+    counts = {}
+
+    def committed(path):
+        update_rollup(path, changes, columns, version)
+        counts['shards'] = sync_shards(path, shard_dir)
+
+    # Refuses with ConcurrentModificationError if another writer got in first
+    write_csv_rows(csv_path, [columns] + rows, expected_version=version, on_commit=committed)
+    return counts['shards'][0] if counts.get('shards') else 0
+
+def iter_merged_rows(shard_dir=SHARD_DIR):
+    """Stream all shard rows in master file order."""
+    manifest = load_manifest(shard_dir)
+
+    def rows():
+        for name in sorted(manifest['shards']):
+            yield from read_shard(shard_dir, manifest['shards'][name])
+
+    return external_sort(rows(), positional_sort_key(manifest['columns']))
+
+def write_merged_view(output_path, shard_dir=SHARD_DIR, csv_path=MASTER_CSV):
+    """Write the merged single-CSV view to output_path, returning the number of rows."""
+    ensure_current(csv_path, shard_dir)
+    manifest = load_manifest(shard_dir)
+    count = 0
+    with atomic_open(output_path) as f:
+        writer = csv.writer(f)
+        writer.writerow(manifest['columns'])
+        for row in iter_merged_rows(shard_dir):
+            writer.writerow(row)
+            count += 1
+    return count
+
+def enrich_shard(columns, rows):
+    """Fill in missing test instructions for one shard."""
+    # Imported here because update_master_tasks re-splits shards through this module
+    from update_master_tasks import test_instructions_for
+
+    instructions = _position(columns, 'Test Instructions')
+    if instructions is None:
+        return rows
+    description, route, status = (_position(columns, name) for name in ('Description', 'Page / Route', 'Status'))
+    with InstructionCache() as cache:
+        for row in rows:
+            if not _cell(row, instructions).strip():
+                row.extend([''] * (instructions + 1 - len(row)))
+                row[instructions] = test_instructions_for(
+                    _cell(row, description), _cell(row, route), _cell(row, status), cache
+                )
+    return rows
+
+def validate_shard(columns, rows):
+    """Return (validation messages, task IDs) for one shard."""
+    task_col, description, priority = (_position(columns, name) for name in ('ID', 'Description', 'Priority'))
+    problems = []
+    seen = set()
+    for row in rows:
+        task_id = _cell(row, task_col).strip()
+        if not task_id:
+            problems.append(f"Missing ID: {_cell(row, description)[:60]}")
+            continue
+        if task_id in seen:
+            problems.append(f"{task_id}: duplicate ID")
+        seen.add(task_id)
+        if not _cell(row, description).strip():
+            problems.append(f"{task_id}: missing Description")
+        if _cell(row, priority) not in VALID_PRIORITIES:
+            problems.append(f"{task_id}: unexpected Priority {_cell(row, priority)!r}")
+    return problems, sorted(seen)
+
+def validate_shards(csv_path=MASTER_CSV, shard_dir=SHARD_DIR, max_workers=None):
+    """Validate all shards in parallel, including ID uniqueness across shards."""
+    results = process_shards(validate_shard, csv_path, shard_dir, max_workers, write=False)
+    problems = []
+    owners = {}
+    for name, (messages, task_ids) in results.items():
+        problems.extend(f"[{name}] {message}" for message in messages)
+        for task_id in task_ids:
+            if owners.setdefault(task_id, name) != name:
+                problems.append(f"{task_id}: used in both {owners[task_id]} and {name}")
+    return problems
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else ''
+
+    if command == 'split':
+        csv_path = Path(args[1]) if len(args) > 1 else MASTER_CSV
+        with file_lock(csv_path):
+            rows, version = read_csv_rows(csv_path)
+            columns, rows = (rows[0], rows[1:]) if rows else ([], [])
+            rewritten, unchanged, removed = write_shards(rows, columns, source=csv_path.name, source_version=version)
+        print(f"✓ Split {len(rows)} tasks into {rewritten + unchanged} shards")
+        print(f"  - {rewritten} rewritten, {unchanged} unchanged, {removed} removed")
+    elif command == 'enrich':
+        try:
+            rewritten = process_shards(enrich_shard)
+        except ConcurrentModificationError:
+            print(f"❌ {MASTER_CSV.name} was changed by another run while enriching; nothing was written.")
+            sys.exit(1)
+        print(f"✓ Enriched {MASTER_CSV.name}; {rewritten} shard(s) rewritten")
+    elif command == 'validate':
+        problems = validate_shards()
+        for problem in problems:
+            print(f"⚠️  {problem}")
+        print(f"✓ Validation finished with {len(problems)} problem(s)")
+        sys.exit(1 if problems else 0)
+    elif command == 'merge' and len(args) > 1:
+        output_path = Path(args[1])
+        count = write_merged_view(output_path)
+        print(f"✓ Wrote merged view of {count} tasks to {output_path}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Compressed, content-deduplicated snapshot archive of the master task list.
+
+Each distinct task record is stored once. Records are packed into gzip
+blocks of about BLOCK_SIZE bytes appended to one block file, and located by
+(block, offset in block). The index maps task ID -> [(snapshot, digest)]
+and only gains an entry when that task changes, so archive size follows the
+number of changes rather than the number of snapshots.
+
+Records are stored positionally against the snapshot's header, so files with
+blank or repeated column names round-trip cell for cell. Columns listed in
+UNVERSIONED_COLUMNS (the date consolidation stamps on every run) do not count
+as a change; instead each snapshot keeps its own copy of those cells next to
+its row order, so a restore reproduces the file exactly as archived.
+
+Usage:
+    python scripts/task_snapshots.py add [CSV]
+    python scripts/task_snapshots.py list
+    python scripts/task_snapshots.py history TASK-001
+    python scripts/task_snapshots.py restore SNAPSHOT OUTPUT_CSV
+"""
+import csv
+import gzip
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+from atomic_io import atomic_open, file_lock
+
+BASE_DIR = Path(__file__).parent.parent
+
+MASTER_CSV = BASE_DIR / 'docs' / 'off_axis_deals_master_tasks.csv'
+ARCHIVE_DIR = BASE_DIR / 'docs' / 'task_snapshots'
+
+BLOCKS_FILE = 'blocks.gz'
+INDEX_FILE = 'index.json.gz'
+
+INDEX_VERSION = 3
+
+# Uncompressed bytes of records packed into one gzip block
+BLOCK_SIZE = 64 * 1024
+
+# Decompressed blocks kept in memory while reading
+BLOCK_CACHE_SIZE = 64
+
+# Bytes of each record digest (hex-encoded in the index)
+DIGEST_SIZE = 8
+
+# Columns left out of the content digest
+UNVERSIONED_COLUMNS = {'Last Updated'}
+
+def _empty_index():
+    return {'version': INDEX_VERSION, 'column_sets': [], 'snapshots': [], 'tasks': {}, 'blocks': [], 'records': {}}
+
+def load_index(archive_dir=ARCHIVE_DIR):
+    """Load the archive index, or an empty one if the archive does not exist."""
+    index_path = Path(archive_dir) / INDEX_FILE
+    if not index_path.exists():
+        return _empty_index()
+    with gzip.open(index_path, 'rt', encoding='utf-8') as f:
+        index = json.load(f)
+    if index.get('version') != INDEX_VERSION:
+        raise ValueError(f"{index_path} uses archive format {index.get('version')}; expected {INDEX_VERSION}")
+    return index
+
+def _save_index(index, archive_dir):
+    data = json.dumps(index, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    with atomic_open(Path(archive_dir) / INDEX_FILE, 'wb', lock=False) as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+
+def _digest(data):
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).hexdigest()
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def _content_digest(columns, values):
+    versioned = [[name, value] for name, value in zip(columns, values) if name not in UNVERSIONED_COLUMNS]
+    # Cells past the header still belong to the row
+    versioned.extend(values[len(columns):])
+    return _digest(_dumps(versioned))
+
+def _as_values(row, columns):
+    if isinstance(row, dict):
+        return [row.get(name, '') or '' for name in columns]
+    # Keep short and long rows as they are so restores reproduce them
+    return list(row)
+
+def _column_set(index, columns):
+    """Return the number of a header in the index, registering it if new."""
+    columns = list(columns)
+    if columns not in index['column_sets']:
+        index['column_sets'].append(columns)
+    return index['column_sets'].index(columns)
+
+def _latest_entry(index, task_id):
+    history = index['tasks'].get(task_id)
+    return history[-1] if history else None
+
+def _unversioned_positions(columns):
+    return [i for i, name in enumerate(columns) if name in UNVERSIONED_COLUMNS]
+
+class _BlockWriter:
+    """Pack new records into gzip blocks appended to the block file."""
+
+    def __init__(self, f, index):
+        self.f = f
+        self.index = index
+        self.offset = f.seek(0, os.SEEK_END)
+        self.pending = []
+        self.pending_size = 0
+
+    def add(self, digest, data):
+        """Store data under digest unless the archive already has it."""
+        records = self.index['records']
+        if digest in records:
+            return
+        records[digest] = [len(self.index['blocks']), self.pending_size, len(data)]
+        self.pending.append(data)
+        self.pending_size += len(data)
+        if self.pending_size >= BLOCK_SIZE:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        block = gzip.compress(b''.join(self.pending), compresslevel=9, mtime=0)
+        self.f.write(block)
+        self.index['blocks'].append([self.offset, len(block)])
+        self.offset += len(block)
+        self.pending = []
+        self.pending_size = 0
+
+class _BlockReader:
+    """Read records back out of the block file, decompressing each block once."""
+
+    def __init__(self, f, index):
+        self.f = f
+        self.index = index
+        self.block = lru_cache(maxsize=BLOCK_CACHE_SIZE)(self._read_block)
+
+    def _read_block(self, number):
+        offset, length = self.index['blocks'][number]
+        self.f.seek(offset)
+        return gzip.decompress(self.f.read(length))
+
+    def record(self, digest):
+        number, offset, length = self.index['records'][digest]
+        return json.loads(self.block(number)[offset:offset + length].decode('utf-8'))
+
+    def values(self, digest, columns=None):
+        """Read one task record as values aligned with columns (default: its own header)."""
+        column_set, values = self.record(digest)
+        stored = self.index['column_sets'][column_set]
+        if columns is None or list(columns) == stored:
+            return values
+        # Header changed since the record was archived: carry cells over by name
+        by_name = {}
+        for name, value in zip(stored, values):
+            by_name.setdefault(name, value)
+        return [by_name.get(name, '') for name in columns]
+
+def add_snapshot(rows, columns, source='', archive_dir=ARCHIVE_DIR):
+    """
+    Archive one version of the task list.
+
+    rows are dicts keyed by columns or lists aligned with them. Only records
+    whose content is new to the archive are compressed and appended; tasks
+    that are unchanged since the previous snapshot add nothing beyond their
+    place in the row order. Returns the new snapshot id.
+    """
+    archive_dir = Path(archive_dir)
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    with file_lock(archive_dir / INDEX_FILE):
+        return _add_snapshot_locked(rows, columns, source, archive_dir)
+
+def _add_snapshot_locked(rows, columns, source, archive_dir):
+    index = load_index(archive_dir)
+    snapshot_id = len(index['snapshots']) + 1
+
+    columns = list(columns)
+    column_set = _column_set(index, columns)
+    id_position = columns.index('ID')
+    unversioned = _unversioned_positions(columns)
+
+    seen_ids = set()
+    changed = 0
+    order = []
+    stamps = []
+    with open(archive_dir / BLOCKS_FILE, 'ab') as f:
+        blocks = _BlockWriter(f, index)
+        for row in rows:
+            values = _as_values(row, columns)
+            digest = _content_digest(columns, values)
+            blocks.add(digest, _dumps([column_set, values]))
+            order.append(digest)
+            stamps.append([values[i] for i in unversioned if i < len(values)])
+
+            task_id = values[id_position] if id_position < len(values) else ''
+            if not task_id:
+                continue
+            seen_ids.add(task_id)
+            latest = _latest_entry(index, task_id)
+            if latest is None or latest[1] != digest:
+                index['tasks'].setdefault(task_id, []).append([snapshot_id, digest])
+                changed += 1
+
+        # Row order and unversioned cells are records too, shared by identical snapshots
+        order_data = _dumps(order)
+        order_digest = _digest(order_data)
+        blocks.add(order_digest, order_data)
+        stamps_data = _dumps(stamps)
+        stamps_digest = _digest(stamps_data)
+        blocks.add(stamps_digest, stamps_data)
+        blocks.flush()
+        f.flush()
+        os.fsync(f.fileno())
+
+    # Record removals as tombstones so task histories show them
+    removed = 0
+    for task_id, history in index['tasks'].items():
+        if task_id not in seen_ids and history[-1][1] is not None:
+            history.append([snapshot_id, None])
+            removed += 1
+
+    index['snapshots'].append({
+        'id': snapshot_id,
+        'columns': column_set,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'source': str(source),
+        'tasks': len(seen_ids),
+        'changed': changed,
+        'removed': removed,
+        'rows': order_digest,
+        'unversioned': stamps_digest,
+    })
+    _save_index(index, archive_dir)
+    return snapshot_id
+
+def add_snapshot_from_csv(csv_path=MASTER_CSV, archive_dir=ARCHIVE_DIR):
+    """Archive the current contents of a master task CSV."""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        return add_snapshot(reader, columns, source=Path(csv_path).name, archive_dir=archive_dir)
+
+def snapshot_columns(snapshot_id, index):
+    """Return the header a snapshot was taken with."""
+    return index['column_sets'][index['snapshots'][snapshot_id - 1]['columns']]
+
+def task_history(task_id, archive_dir=ARCHIVE_DIR, index=None):
+    """Return [(snapshot_id, values or None)] for every change to one task, aligned with that snapshot's header."""
+    archive_dir = Path(archive_dir)
+    index = index or load_index(archive_dir)
+    history = index['tasks'].get(task_id, [])
+    if not history:
+        return []
+    result = []
+    with open(archive_dir / BLOCKS_FILE, 'rb') as f:
+        reader = _BlockReader(f, index)
+        for snapshot_id, digest in history:
+            row = reader.values(digest, snapshot_columns(snapshot_id, index)) if digest else None
+            result.append((snapshot_id, row))
+    return result
+
+def iter_snapshot(snapshot_id, archive_dir=ARCHIVE_DIR, index=None):
+    """Yield a snapshot's rows of values in the order they were archived."""
+    archive_dir = Path(archive_dir)
+    index = index or load_index(archive_dir)
+    snapshot = index['snapshots'][snapshot_id - 1]
+    columns = snapshot_columns(snapshot_id, index)
+    unversioned = _unversioned_positions(columns)
+    with open(archive_dir / BLOCKS_FILE, 'rb') as f:
+        reader = _BlockReader(f, index)
+        order = reader.record(snapshot['rows'])
+        stamps = reader.record(snapshot['unversioned'])
+        for digest, stamp in zip(order, stamps):
+            values = reader.values(digest, columns)
+            for i, value in zip(unversioned, stamp):
+                values[i] = value
+            yield values
+
+def read_snapshot(snapshot_id, archive_dir=ARCHIVE_DIR, index=None):
+    """Reconstruct a snapshot as (header, rows of values) in its original row order."""
+    index = index or load_index(archive_dir)
+    return snapshot_columns(snapshot_id, index), list(iter_snapshot(snapshot_id, archive_dir, index))
+
+def main():
+    args = sys.argv[1:]
+    command = args[0] if args else 'add'
+
+    if command == 'add':
+        csv_path = Path(args[1]) if len(args) > 1 else MASTER_CSV
+        snapshot_id = add_snapshot_from_csv(csv_path)
+        snapshot = load_index()['snapshots'][-1]
+        print(f"✓ Archived snapshot {snapshot_id} from {csv_path}")
+        print(f"  - {snapshot['tasks']} tasks, {snapshot['changed']} changed, {snapshot['removed']} removed")
+    elif command == 'list':
+        for snapshot in load_index()['snapshots']:
+            print(f"{snapshot['id']:>4}  {snapshot['created']}  {snapshot['tasks']} tasks  "
+                  f"+{snapshot['changed']} -{snapshot['removed']}  {snapshot['source']}")
+    elif command == 'history' and len(args) == 2:
+        index = load_index()
+        for snapshot_id, row in task_history(args[1], index=index):
+            if row is None:
+                print(f"[{snapshot_id}] (removed)")
+            else:
+                columns = snapshot_columns(snapshot_id, index)
+                status, priority, description = (
+                    row[columns.index(name)] if name in columns else ''
+                    for name in ('Status', 'Priority', 'Description')
+                )
+                print(f"[{snapshot_id}] {status} | {priority} | {description}")
+    elif command == 'restore' and len(args) == 3:
+        index = load_index()
+        snapshot_id = int(args[1])
+        count = 0
+        with atomic_open(args[2]) as f:
+            writer = csv.writer(f)
+            writer.writerow(snapshot_columns(snapshot_id, index))
+            for values in iter_snapshot(snapshot_id, index=index):
+                writer.writerow(values)
+                count += 1
+        print(f"✓ Restored {count} tasks from snapshot {args[1]} to {args[2]}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
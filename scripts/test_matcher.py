@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Match tasks to test-matrix scenarios using a TF-IDF weighted inverted token index.
+"""
+import heapq
+import math
+import re
+from collections import defaultdict
+
+# Matching defaults
+DEFAULT_TOP_K = 3
+DEFAULT_THRESHOLD = 0.15
+
+# Field weights applied to term frequencies when indexing scenarios
+SCENARIO_FIELD_WEIGHTS = {
+    'feature': 3.0,
+    'scenario': 2.0,
+    'steps': 1.0,
+}
+
+# Field weights applied to term frequencies when querying with a task
+TASK_FIELD_WEIGHTS = {
+    'feature': 3.0,
+    'description': 2.0,
+    'route': 1.5,
+}
+
+# Postings longer than this fraction of the corpus carry almost no signal
+# and are skipped at query time so common words never dominate the cost.
+MAX_POSTING_FRACTION = 0.5
+
+# In large matrices tokens found in more than this fraction of scenarios act
+# as matrix-specific stopwords and are skipped too, which bounds query cost
+# at 10k+ scenarios. The cutoff never drops below MIN_MAX_POSTINGS, so small
+# matrices are matched exactly as before.
+LARGE_MATRIX_POSTING_FRACTION = 0.02
+MIN_MAX_POSTINGS = 64
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have if in into is it its
+of on or that the then this to was were will with verify check test log open
+should not no new user page
+""".split())
+
+def tokenize(text):
+    """Split text into lowercase tokens, dropping stopwords and single characters."""
+    if not text:
+        return []
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def _weighted_terms(fields, weights):
+    """Combine per-field term frequencies into one weighted term map."""
+    terms = defaultdict(float)
+    for name, text in fields.items():
+        weight = weights.get(name, 1.0)
+        for token in tokenize(text):
+            terms[token] += weight
+    return terms
+
+def build_scenario_index(scenarios):
+    """
+    Build an inverted index over test-matrix scenarios.
+
+    Each scenario is a dict with 'feature', 'scenario', 'steps' and
+    'instructions' keys. Postings hold L2-normalised TF-IDF weights so a
+    query score is a cosine similarity.
+    """
+    doc_terms = []
+    doc_freq = defaultdict(int)
+    for scenario in scenarios:
+        terms = _weighted_terms(
+            {
+                'feature': scenario.get('feature', ''),
+                'scenario': scenario.get('scenario', ''),
+                'steps': scenario.get('steps', ''),
+            },
+            SCENARIO_FIELD_WEIGHTS,
+        )
+        doc_terms.append(terms)
+        for token in terms:
+            doc_freq[token] += 1
+
+    n_docs = len(scenarios)
+    idf = {token: math.log((1 + n_docs) / (1 + df)) + 1.0 for token, df in doc_freq.items()}
+
+    postings = defaultdict(list)
+    for doc_id, terms in enumerate(doc_terms):
+        weights = {t: (1.0 + math.log(tf)) * idf[t] for t, tf in terms.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        for token, weight in weights.items():
+            postings[token].append((doc_id, weight / norm))
+
+    max_postings = max(1, int(n_docs * MAX_POSTING_FRACTION)) if n_docs > 10 else n_docs
+    max_postings = min(max_postings, max(MIN_MAX_POSTINGS, int(n_docs * LARGE_MATRIX_POSTING_FRACTION)))
+    return {
+        'scenarios': list(scenarios),
+        'postings': dict(postings),
+        'idf': idf,
+        'max_postings': max_postings,
+    }
+
+def match_task(index, task, top_k=DEFAULT_TOP_K, threshold=DEFAULT_THRESHOLD):
+    """Return up to top_k (score, scenario) pairs scoring at or above threshold."""
+    terms = _weighted_terms(
+        {
+            'feature': task.get('feature', ''),
+            'description': task.get('description', ''),
+            'route': task.get('route', '').replace('/', ' ').replace('-', ' '),
+        },
+        TASK_FIELD_WEIGHTS,
+    )
+    idf = index['idf']
+    postings = index['postings']
+    max_postings = index['max_postings']
+
+    query = {}
+    for token, tf in terms.items():
+        if token in idf and len(postings[token]) <= max_postings:
+            query[token] = (1.0 + math.log(tf)) * idf[token]
+    if not query:
+        return []
+    norm = math.sqrt(sum(w * w for w in query.values()))
+
+    scores = defaultdict(float)
+    for token, q_weight in query.items():
+        q_weight /= norm
+        for doc_id, d_weight in postings[token]:
+            scores[doc_id] += q_weight * d_weight
+
+    best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+    scenarios = index['scenarios']
+    return [(score, scenarios[doc_id]) for doc_id, score in best if score >= threshold]
+
+def format_instructions(matches):
+    """Join matched scenarios into a single Test Instructions value."""
+    return '\n\n'.join(scenario['instructions'] for _, scenario in matches if scenario.get('instructions'))
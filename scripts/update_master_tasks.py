@@ -3,13 +3,22 @@
 Update off_axis_deals_master_tasks.csv:
 1. Add test instructions to all tasks missing them
 2. Append new tasks for future development from comprehensive roadmap
+
+Changes are patched into the file through its row index; pass --rewrite to
+rewrite the whole file instead.
 """
 
-import csv
 import sys
 from datetime import datetime
 from pathlib import Path
 
+from atomic_io import ConcurrentModificationError, LockTimeout, file_lock, file_version, read_csv_rows, write_csv_rows
+from instruction_cache import InstructionCache, cache_key, rules_version
+from row_index import append_tasks, load_index, patch_tasks
+from task_ids import allocate, task_fingerprint
+from task_rollups import update_rollup
+from task_shards import sync_shards
+
 # Get the project root
 project_root = Path(__file__).parent.parent
 csv_path = project_root / "docs" / "off_axis_deals_master_tasks.csv"
@@ -23,281 +32,423 @@ def escape_csv_value(value):
         return '"' + value.replace('"', '""') + '"'
     return value
 
-def add_test_instructions(row):
-    """Add appropriate test instructions to a row if missing"""
-    task_id = row[0]
-    description = row[3]
-    status = row[5]
-    test_instructions = row[9]
-    
-    # If test instructions already exist, return as-is
-    if test_instructions and test_instructions.strip():
-        return row
-    
-    # Generate test instructions based on task description and status
-    if "multi-image upload" in description.lower():
-        test_instructions = """1) Login as wholesaler.
+# Ordered rule table for generated test instructions; the first matching rule wins.
+# Each 'match' entry is a substring, or a tuple of substrings that must all appear.
+# With 'lowercase' set the substrings are looked up in the lowercased description.
+TEST_INSTRUCTION_RULES = [
+    {
+        'match': ['multi-image upload'],
+        'lowercase': True,
+        'instructions': """1) Login as wholesaler.
 2) Navigate to Post a Deal page.
 3) Upload multiple images (3-5 photos).
 4) Verify all images upload successfully and appear in preview.
 5) Submit listing and verify all images are saved.
-6) View listing detail page and verify all images display in carousel."""
-    
-    elif "Alerts Admin" in description:
-        test_instructions = """1) Login as admin user.
+6) View listing detail page and verify all images display in carousel.""",
+    },
+    {
+        'match': ['Alerts Admin'],
+        'lowercase': False,
+        'instructions': """1) Login as admin user.
 2) Navigate to /admin/alerts page.
 3) Verify alerts list loads without errors.
 4) Test real-time subscription updates by creating/modifying alerts from another session.
-5) Verify error handling when alerts service is unavailable."""
-    
-    elif "Watchlist Admin" in description:
-        test_instructions = """1) Login as admin user.
+5) Verify error handling when alerts service is unavailable.""",
+    },
+    {
+        'match': ['Watchlist Admin'],
+        'lowercase': False,
+        'instructions': """1) Login as admin user.
 2) Navigate to /admin/watchlists page.
 3) Verify watchlist data loads correctly.
 4) Test filtering and sorting functionality.
-5) Verify error handling for deleted/unavailable listings."""
-    
-    elif "Analytics Dashboard" in description and "Admin" in description:
-        test_instructions = """1) Login as admin user.
+5) Verify error handling for deleted/unavailable listings.""",
+    },
+    {
+        'match': [('Analytics Dashboard', 'Admin')],
+        'lowercase': False,
+        'instructions': """1) Login as admin user.
 2) Navigate to /admin/analytics.
 3) Verify dashboard loads with all metrics displaying correctly.
 4) Test date range filters and verify charts update.
 5) Verify data accuracy and no NaN/undefined values.
-6) Test export functionality if available."""
-    
-    elif "Stripe webhooks" in description.lower():
-        test_instructions = """1) Use Stripe CLI to forward webhooks to local environment.
+6) Test export functionality if available.""",
+    },
+    {
+        'match': ['Stripe webhooks'],
+        'lowercase': True,
+        'instructions': """1) Use Stripe CLI to forward webhooks to local environment.
 2) Trigger test events: subscription.created, subscription.updated, subscription.deleted, payment_succeeded.
 3) Verify webhook handlers process events correctly.
 4) Verify idempotency - duplicate events are handled gracefully.
 5) Check database to ensure subscription status updates correctly.
-6) Test in production with real Stripe events."""
-    
-    elif "map rendering" in description.lower():
-        test_instructions = """1) Navigate to listings page.
+6) Test in production with real Stripe events.""",
+    },
+    {
+        'match': ['map rendering'],
+        'lowercase': True,
+        'instructions': """1) Navigate to listings page.
 2) Verify map renders without flicker or errors.
 3) Test marker clustering with multiple listings.
 4) Verify polygon drawing works and persists correctly.
 5) Check browser console for AdvancedMarkerElement deprecation warnings.
-6) Test on mobile and desktop browsers."""
-    
-    elif "CRM Export" in description:
-        test_instructions = """1) Login as admin.
+6) Test on mobile and desktop browsers.""",
+    },
+    {
+        'match': ['CRM Export'],
+        'lowercase': False,
+        'instructions': """1) Login as admin.
 2) Navigate to CRM Export page.
 3) Verify export functionality is implemented (not 'Coming Soon').
 4) Test CSV export with various filters.
-5) Verify exported data matches database records."""
-    
-    elif "Repair Estimator" in description:
-        test_instructions = """1) Navigate to repair estimator tool (if route exists).
+5) Verify exported data matches database records.""",
+    },
+    {
+        'match': ['Repair Estimator'],
+        'lowercase': False,
+        'instructions': """1) Navigate to repair estimator tool (if route exists).
 2) Input property details and verify estimator logic runs.
 3) Verify results display correctly.
-4) Test with different property types and conditions."""
-    
-    elif "AI Usage Reporting" in description:
-        test_instructions = """1) Login as admin.
+4) Test with different property types and conditions.""",
+    },
+    {
+        'match': ['AI Usage Reporting'],
+        'lowercase': False,
+        'instructions': """1) Login as admin.
 2) Navigate to AI usage reporting page.
 3) Verify usage metrics display correctly for all users.
 4) Test filtering by user, date range, feature type.
-5) Verify quota tracking matches actual usage."""
-    
-    elif "production env vars" in description.lower():
-        test_instructions = """1) Review all environment variables required for production.
+5) Verify quota tracking matches actual usage.""",
+    },
+    {
+        'match': ['production env vars'],
+        'lowercase': True,
+        'instructions': """1) Review all environment variables required for production.
 2) Verify all required vars are set in Vercel production environment.
 3) Check that sensitive keys (API keys, secrets) are properly secured.
 4) Test application startup with all env vars configured.
-5) Verify no missing or undefined env var errors in production logs."""
-    
-    elif "image carousel" in description.lower():
-        test_instructions = """1) Navigate to a listing with multiple images.
+5) Verify no missing or undefined env var errors in production logs.""",
+    },
+    {
+        'match': ['image carousel'],
+        'lowercase': True,
+        'instructions': """1) Navigate to a listing with multiple images.
 2) Verify carousel displays all images correctly.
 3) Test navigation (next/previous arrows, dots).
 4) Verify smooth transitions and animations.
-5) Test on mobile and desktop."""
-    
-    elif "pagination" in description.lower() or "infinite scroll" in description.lower():
-        test_instructions = """1) Navigate to listings page with many results.
+5) Test on mobile and desktop.""",
+    },
+    {
+        'match': ['pagination', 'infinite scroll'],
+        'lowercase': True,
+        'instructions': """1) Navigate to listings page with many results.
 2) Verify pagination or infinite scroll works correctly.
 3) Test page navigation (if pagination) or scroll loading (if infinite scroll).
 4) Verify URL parameters update correctly.
-5) Test with filters applied."""
-    
-    elif "PDF output" in description.lower():
-        test_instructions = """1) Generate an AI analysis report.
+5) Test with filters applied.""",
+    },
+    {
+        'match': ['PDF output'],
+        'lowercase': True,
+        'instructions': """1) Generate an AI analysis report.
 2) Verify PDF download button/link is available.
 3) Click download and verify PDF generates correctly.
 4) Verify PDF contains all expected content.
-5) Test PDF opens correctly in various PDF viewers."""
-    
-    elif "national trend scraping" in description.lower():
-        test_instructions = """1) Verify scraping jobs are scheduled and running.
+5) Test PDF opens correctly in various PDF viewers.""",
+    },
+    {
+        'match': ['national trend scraping'],
+        'lowercase': True,
+        'instructions': """1) Verify scraping jobs are scheduled and running.
 2) Check database for scraped trend data.
 3) Verify data appears in analytics dashboard.
-4) Test data freshness and update frequency."""
-    
-    elif "RecData" in description:
-        test_instructions = """1) Verify RecData integration is configured.
+4) Test data freshness and update frequency.""",
+    },
+    {
+        'match': ['RecData'],
+        'lowercase': False,
+        'instructions': """1) Verify RecData integration is configured.
 2) Test sold comps data retrieval.
 3) Verify data displays in listing detail pages.
-4) Check data accuracy and completeness."""
-    
-    elif "lead notes" in description.lower():
-        test_instructions = """1) Navigate to CRM/leads section.
+4) Check data accuracy and completeness.""",
+    },
+    {
+        'match': ['lead notes'],
+        'lowercase': True,
+        'instructions': """1) Navigate to CRM/leads section.
 2) Select a lead.
 3) Verify notes field/section is available.
 4) Add, edit, and delete notes.
-5) Verify notes persist and display correctly."""
-    
-    elif "homepage design" in description.lower():
-        test_instructions = """1) Navigate to homepage.
+5) Verify notes persist and display correctly.""",
+    },
+    {
+        'match': ['homepage design'],
+        'lowercase': True,
+        'instructions': """1) Navigate to homepage.
 2) Verify new design matches Redfin/Zillow quality standards.
 3) Test responsive design on mobile, tablet, desktop.
 4) Verify value proposition is clear and compelling.
-5) Test all CTAs and navigation elements."""
-    
-    elif "testimonials" in description.lower() or "trust badges" in description.lower():
-        test_instructions = """1) Navigate to homepage.
+5) Test all CTAs and navigation elements.""",
+    },
+    {
+        'match': ['testimonials', 'trust badges'],
+        'lowercase': True,
+        'instructions': """1) Navigate to homepage.
 2) Verify testimonials section displays correctly.
 3) Verify trust badges/logos are visible.
 4) Test on mobile and desktop.
-5) Verify testimonials rotate or display appropriately."""
-    
-    elif "loading skeletons" in description.lower():
-        test_instructions = """1) Navigate to listings page.
+5) Verify testimonials rotate or display appropriately.""",
+    },
+    {
+        'match': ['loading skeletons'],
+        'lowercase': True,
+        'instructions': """1) Navigate to listings page.
 2) Trigger slow network (throttle in dev tools).
 3) Verify skeleton loaders display during data fetch.
 4) Verify skeletons match final content layout.
-5) Test on multiple pages that load data."""
-    
-    elif "wholesaler/investor flows" in description.lower():
-        test_instructions = """1) Test new user signup flow for wholesaler.
+5) Test on multiple pages that load data.""",
+    },
+    {
+        'match': ['wholesaler/investor flows'],
+        'lowercase': True,
+        'instructions': """1) Test new user signup flow for wholesaler.
 2) Test new user signup flow for investor.
 3) Verify onboarding steps guide users appropriately.
-4) Test flow completion and profile setup."""
-    
-    elif "landing page lead capture" in description.lower():
-        test_instructions = """1) Visit landing page as anonymous user.
+4) Test flow completion and profile setup.""",
+    },
+    {
+        'match': ['landing page lead capture'],
+        'lowercase': True,
+        'instructions': """1) Visit landing page as anonymous user.
 2) Verify lead capture form is prominent and clear.
 3) Submit test lead information.
 4) Verify lead is saved to database.
-5) Test email notification is sent (if applicable)."""
-    
-    elif "DB indexing" in description:
-        test_instructions = """1) Review database schema and identify slow queries.
+5) Test email notification is sent (if applicable).""",
+    },
+    {
+        'match': ['DB indexing'],
+        'lowercase': False,
+        'instructions': """1) Review database schema and identify slow queries.
 2) Create indexes on frequently queried columns.
 3) Test query performance before and after indexing.
 4) Verify no negative impact on write performance.
-5) Monitor query execution times in production."""
-    
-    elif "rate limits" in description.lower():
-        test_instructions = """1) Identify public API endpoints.
+5) Monitor query execution times in production.""",
+    },
+    {
+        'match': ['rate limits'],
+        'lowercase': True,
+        'instructions': """1) Identify public API endpoints.
 2) Implement rate limiting middleware.
 3) Test rate limit enforcement by making excessive requests.
 4) Verify appropriate error responses (429 Too Many Requests).
-5) Test rate limit reset and recovery."""
-    
-    elif "sign-in loops" in description.lower():
-        test_instructions = """1) Test sign-in flow across all pages.
+5) Test rate limit reset and recovery.""",
+    },
+    {
+        'match': ['sign-in loops'],
+        'lowercase': True,
+        'instructions': """1) Test sign-in flow across all pages.
 2) Verify no redirect loops occur.
 3) Test session persistence after login.
 4) Verify cookies are set correctly.
-5) Test on different browsers and devices."""
-    
-    elif "mobile responsiveness" in description.lower():
-        test_instructions = """1) Test all pages on mobile devices (iPhone, Android).
+5) Test on different browsers and devices.""",
+    },
+    {
+        'match': ['mobile responsiveness'],
+        'lowercase': True,
+        'instructions': """1) Test all pages on mobile devices (iPhone, Android).
 2) Verify layouts adapt correctly to small screens.
 3) Test touch interactions and gestures.
 4) Verify navigation works on mobile.
-5) Test on tablet sizes as well."""
-    
-    elif "session persistence" in description.lower():
-        test_instructions = """1) Login and verify session is established.
+5) Test on tablet sizes as well.""",
+    },
+    {
+        'match': ['session persistence'],
+        'lowercase': True,
+        'instructions': """1) Login and verify session is established.
 2) Refresh page and verify user remains logged in.
 3) Close browser and reopen - verify session persists.
 4) Test session expiration and renewal.
-5) Test on mobile web and native app."""
-    
-    elif "Owner-only edit/delete" in description:
-        test_instructions = """1) Login as listing owner.
+5) Test on mobile web and native app.""",
+    },
+    {
+        'match': ['Owner-only edit/delete'],
+        'lowercase': False,
+        'instructions': """1) Login as listing owner.
 2) Verify edit/delete buttons are visible on own listings.
 3) Login as different user.
 4) Verify edit/delete buttons are NOT visible on other users' listings.
-5) Attempt direct API access to edit/delete other user's listing - verify 403 error."""
-    
-    elif "watchlist errors" in description.lower():
-        test_instructions = """1) Add listings to watchlist.
+5) Attempt direct API access to edit/delete other user's listing - verify 403 error.""",
+    },
+    {
+        'match': ['watchlist errors'],
+        'lowercase': True,
+        'instructions': """1) Add listings to watchlist.
 2) Delete a listing that's in watchlist.
 3) Verify watchlist handles deleted listings gracefully.
 4) Test error messages are user-friendly.
-5) Verify watchlist still functions correctly."""
-    
-    elif "CSV/API Export" in description:
-        test_instructions = """1) Navigate to export page/endpoint.
+5) Verify watchlist still functions correctly.""",
+    },
+    {
+        'match': ['CSV/API Export'],
+        'lowercase': False,
+        'instructions': """1) Navigate to export page/endpoint.
 2) Select data filters.
 3) Initiate CSV export.
 4) Verify CSV downloads correctly.
 5) Verify CSV contains expected data and format.
-6) Test API export endpoint returns JSON correctly."""
-    
-    elif "Export Reports" in description:
-        test_instructions = """1) Login as admin.
+6) Test API export endpoint returns JSON correctly.""",
+    },
+    {
+        'match': ['Export Reports'],
+        'lowercase': False,
+        'instructions': """1) Login as admin.
 2) Navigate to reports export page.
 3) Select report type and date range.
 4) Generate and download report.
-5) Verify report contains correct data."""
-    
-    elif "AI Analyzer errors" in description.lower():
-        test_instructions = """1) Test AI analyzer with valid inputs.
+5) Verify report contains correct data.""",
+    },
+    {
+        'match': ['AI Analyzer errors'],
+        'lowercase': True,
+        'instructions': """1) Test AI analyzer with valid inputs.
 2) Test with invalid/edge case inputs.
 3) Verify error messages are clear and helpful.
 4) Test quota limits and verify appropriate messaging.
-5) Test when AI service is unavailable."""
-    
-    elif "error logging" in description.lower():
-        test_instructions = """1) Trigger various errors (network, validation, server).
+5) Test when AI service is unavailable.""",
+    },
+    {
+        'match': ['error logging'],
+        'lowercase': True,
+        'instructions': """1) Trigger various errors (network, validation, server).
 2) Verify errors are logged to Sentry/LogRocket.
 3) Verify error details include useful context.
 4) Test error alerting (if configured).
-5) Verify production logs are accessible."""
-    
-    elif "mobile-first search" in description.lower():
-        test_instructions = """1) Test search on mobile device.
+5) Verify production logs are accessible.""",
+    },
+    {
+        'match': ['mobile-first search'],
+        'lowercase': True,
+        'instructions': """1) Test search on mobile device.
 2) Verify search bar is easily accessible.
 3) Test autocomplete and suggestions.
 4) Verify filters work well on mobile.
-5) Test search results display correctly."""
-    
-    elif "line-item output" in description.lower():
-        test_instructions = """1) Generate repair estimate.
+5) Test search results display correctly.""",
+    },
+    {
+        'match': ['line-item output'],
+        'lowercase': True,
+        'instructions': """1) Generate repair estimate.
 2) Verify line items display in UI.
 3) Verify itemized breakdown is clear.
 4) Test export of line items.
-5) Verify calculations are correct."""
-    
-    elif "message notifications" in description.lower():
-        test_instructions = """1) Send a message to a user.
+5) Verify calculations are correct.""",
+    },
+    {
+        'match': ['message notifications'],
+        'lowercase': True,
+        'instructions': """1) Send a message to a user.
 2) Verify recipient receives notification.
 3) Test notification delivery methods (in-app, email).
 4) Verify notification preferences are respected.
-5) Test notification dismissal and marking as read."""
-    
-    else:
-        # Default test instructions
-        test_instructions = f"""1) Navigate to relevant page/route: {row[2]}.
-2) Verify feature/functionality works as described: {description[:100]}.
+5) Test notification dismissal and marking as read.""",
+    },
+]
+
+DEFAULT_TEST_INSTRUCTIONS = """1) Navigate to relevant page/route: {route}.
+2) Verify feature/functionality works as described: {description}.
 3) Test with various inputs and edge cases.
 4) Verify error handling is appropriate.
 5) Test on mobile and desktop if applicable."""
+
+def _rule_versions():
+    """
+    Version each rule by its own entry and the match terms of the rules before it.
+
+    Because the first matching rule wins, a cached result stays valid exactly
+    while its own rule is unchanged and no earlier rule matches differently.
+    The instructions text of earlier rules does not affect which rule wins, so
+    it is left out. The last entry versions the default template.
+    """
+    versions = []
+    earlier_terms = ''
+    for rule in TEST_INSTRUCTION_RULES:
+        versions.append(rules_version(earlier_terms, rule))
+        earlier_terms = rules_version(earlier_terms, rule['match'], rule['lowercase'])
+    versions.append(rules_version(earlier_terms, DEFAULT_TEST_INSTRUCTIONS))
+    return versions
+
+RULE_VERSIONS = _rule_versions()
+VALID_RULE_VERSIONS = frozenset(RULE_VERSIONS)
+
+def rule_matches(rule, description):
+    """Return True if a rule table entry matches the description."""
+    text = description.lower() if rule['lowercase'] else description
+    for term in rule['match']:
+        terms = term if isinstance(term, tuple) else (term,)
+        if all(t in text for t in terms):
+            return True
+    return False
+
+def generate_test_instructions(description, route):
+    """Return (rule version, instructions) from the first matching rule."""
+    for rule, version in zip(TEST_INSTRUCTION_RULES, RULE_VERSIONS):
+        if rule_matches(rule, description):
+            return version, rule['instructions']
+    # Default test instructions
+    return RULE_VERSIONS[-1], DEFAULT_TEST_INSTRUCTIONS.format(route=route, description=description[:100])
+
+def test_instructions_for(description, route, status, cache=None):
+    """Return generated test instructions, served from the cache when inputs are unchanged"""
+    if cache is None:
+        return generate_test_instructions(description, route)[1]
+    key = cache_key('update_master_tasks', description, route, status)
+    return cache.get_or_create(
+        key, VALID_RULE_VERSIONS, lambda: generate_test_instructions(description, route)
+    )
+
+def add_test_instructions(row, cache=None):
+    """Add appropriate test instructions to a row if missing"""
+    test_instructions = row[9]
     
-    row[9] = test_instructions
+    # If test instructions already exist, return as-is
+    if test_instructions and test_instructions.strip():
+        return row
+    
+    row[9] = test_instructions_for(row[3], row[2], row[5], cache)
     return row
 
+def patch_master(path, filled, new_tasks, version, on_commit=None):
+    """
+    Write filled-in rows and new tasks through the row index instead of a rewrite.
+
+    Only the changed and new records are encoded; everything else is copied
+    byte for byte into an atomically replaced file. on_commit runs with path
+    before the lock is released. Returns the new file version, or None when
+    the rows cannot be addressed by a unique ID and a full rewrite is needed.
+    """
+    with file_lock(path):
+        if file_version(path) != version:
+            raise ConcurrentModificationError(f"{path} changed since it was read")
+        index = load_index(path)
+        updates = {row[0].strip(): row for row in filled}
+        patchable = (
+            len(updates) == len(filled)
+            and all(task_id and task_id in index['records'] and task_id not in index['duplicates'] for task_id in updates)
+            and all(task[0] not in index['records'] for task in new_tasks)
+            and len({task[0] for task in new_tasks}) == len(new_tasks)
+        )
+        if not patchable:
+            return None
+        if updates:
+            patch_tasks(updates, path, lock=False)
+        append_tasks(new_tasks, path, lock=False)
+        if on_commit is not None:
+            on_commit(path)
+        return file_version(path)
+
 def main():
-    # Read existing CSV
-    rows = []
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        rows = list(reader)
+    # Read existing CSV, remembering the version we started from
+    rows, version = read_csv_rows(csv_path)
     
     if not rows:
         print("Error: CSV file is empty or couldn't be read")
@@ -308,22 +459,27 @@ def main():
     
     # Update existing rows with test instructions
     updated_rows = [header]
+    filled = []
     next_id = len(data_rows) + 1
     
-    for row in data_rows:
-        # Ensure row has correct number of columns
-        while len(row) < len(header):
-            row.append("")
-        updated_row = add_test_instructions(row)
-        updated_rows.append(updated_row)
-        # Track highest task ID
-        if row[0].startswith("TASK-"):
-            try:
-                task_num = int(row[0].replace("TASK-", ""))
-                if task_num >= next_id:
-                    next_id = task_num + 1
-            except:
-                pass
+    with InstructionCache() as cache:
+        for row in data_rows:
+            # Ensure row has correct number of columns
+            while len(row) < len(header):
+                row.append("")
+            was_missing = not row[9].strip()
+            updated_row = add_test_instructions(row, cache)
+            updated_rows.append(updated_row)
+            if was_missing and updated_row[9]:
+                filled.append(updated_row)
+            # Track highest task ID
+            if row[0].startswith("TASK-"):
+                try:
+                    task_num = int(row[0].replace("TASK-", ""))
+                    if task_num >= next_id:
+                        next_id = task_num + 1
+                except:
+                    pass
     
     # Append new tasks from roadmap
     today = datetime.now().strftime("%m/%d/%Y")
@@ -478,59 +634,48 @@ def main():
         ["TASK-175", "Roadmap - Phase 6", "/affiliates", "Phase 6 Sub-task: Create and manage affiliate program", "Low", "Planned", "", "Both", today, "1) Design affiliate program. 2) Build affiliate tracking. 3) Create affiliate dashboard. 4) Recruit affiliates. 5) Manage and optimize program.", "Affiliate program scales growth."],
     ]
     
+    # The literal IDs above are only preferences: the ID map keeps each task's
+    # existing ID and renumbers any that already belong to other content
+    assigned = allocate((task_fingerprint(task[3], task[2]), task[0]) for task in new_tasks)
+    existing_ids = {row[0].strip() for row in data_rows}
+    for task, task_id in zip(new_tasks, assigned):
+        task[0] = task_id
+    already_present = sum(task[0] in existing_ids for task in new_tasks)
+    new_tasks = [task for task in new_tasks if task[0] not in existing_ids]
+    
     # Add new tasks to CSV
     for task in new_tasks:
         updated_rows.append(task)
     
-    # Write directly to CSV file using Windows-friendly approach
-    import shutil
-    import os
-    
-    temp_path = output_path.with_suffix('.csv.tmp')
+    def committed(path):
+        # Rollup dimensions are untouched by test instructions, so only appends count
+        update_rollup(path, [(None, task) for task in new_tasks], header, version)
+        sync_shards(path)
     
     try:
-        # Write to temp file first
-        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerows(updated_rows)
-        
-        # Delete original if it exists
-        if output_path.exists():
-            try:
-                output_path.unlink()
-            except PermissionError as pe:
-                print(f"⚠️  Could not delete {csv_path} (file may be open in Excel/editor)")
-                print(f"   Error: {pe}")
-                print(f"   Updated file written to: {temp_path}")
-                print(f"   Please close {csv_path.name} and manually rename {temp_path.name} to {output_path.name}")
-                sys.exit(1)
-            except Exception as e:
-                print(f"⚠️  Error deleting old file: {e}")
-                print(f"   Updated file written to: {temp_path}")
-                sys.exit(1)
-        
-        # Move temp file to final location
-        try:
-            shutil.move(str(temp_path), str(output_path))
-            print(f"✅ Successfully updated {csv_path.name}")
-            print(f"   - Updated {len(data_rows)} existing rows with test instructions")
-            print(f"   - Added {len(new_tasks)} new tasks for future development")
-            print(f"   - Total tasks: {len(updated_rows) - 1}")
-        except Exception as e:
-            print(f"⚠️  Could not move temp file to final location: {e}")
-            print(f"   Updated file is at: {temp_path}")
-            print(f"   Please manually rename it to: {output_path.name}")
-        
-    except Exception as e:
-        print(f"❌ Error writing CSV: {e}")
-        import traceback
-        traceback.print_exc()
-        if temp_path.exists():
-            try:
-                temp_path.unlink()
-            except:
-                pass
-        raise
+        if '--rewrite' in sys.argv[1:]:
+            new_version = None
+        else:
+            new_version = patch_master(output_path, filled, new_tasks, version, on_commit=committed)
+            if new_version is None:
+                print("⚠️  Task IDs are missing or repeated; rewriting the whole file instead of patching")
+        if new_version is None:
+            # Atomically replace the CSV, refusing if another run changed it meanwhile
+            write_csv_rows(output_path, updated_rows, expected_version=version, on_commit=committed)
+    except ConcurrentModificationError:
+        print(f"❌ {csv_path.name} was changed by another run while updating; nothing was written.")
+        print("   Re-run this script to apply the update on top of the latest version.")
+        sys.exit(1)
+    except LockTimeout as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    print(f"✅ Successfully updated {csv_path.name}")
+    print(f"   - Updated {len(data_rows)} existing rows with test instructions")
+    print(f"   - Added {len(new_tasks)} new tasks for future development")
+    if already_present:
+        print(f"   - Skipped {already_present} roadmap tasks already in the file")
+    print(f"   - Total tasks: {len(updated_rows) - 1}")
 
 if __name__ == "__main__":
     main()
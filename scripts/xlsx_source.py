@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Streaming XLSX reader built on zipfile and xml.etree.ElementTree.iterparse.
+
+Rows are yielded lazily and parsed elements are cleared as soon as they are
+consumed, so memory stays flat regardless of sheet length. Shared strings
+are kept as UTF-8 in one buffer with an array of offsets, rather than one
+str object each, and decoded when a cell refers to them.
+
+Usage:
+    python scripts/xlsx_source.py WORKBOOK.xlsx [SHEET] > out.csv
+"""
+import csv
+import posixpath
+from array import array
+import sys
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+MAIN_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PKG_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+def _text_of(elem):
+    """Concatenate <t> runs of a shared or inline string, skipping phonetic runs."""
+    parts = []
+    for child in elem.iter():
+        if child.tag == f'{MAIN_NS}rPh':
+            continue
+        if child.tag == f'{MAIN_NS}t' and child.text:
+            parts.append(child.text)
+    return ''.join(parts)
+
+class SharedStrings:
+    """Shared string table packed into one UTF-8 buffer, indexed by string id."""
+
+    def __init__(self):
+        self.data = bytearray()
+        # offsets[i]:offsets[i + 1] is string i
+        self.offsets = array('I', [0])
+
+    def append(self, text):
+        self.data += text.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if not 0 <= index < len(self):
+            raise IndexError(f"shared string {index} out of range")
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8')
+
+def _read_shared_strings(zf):
+    """Load the shared string table indexed by string id."""
+    table = SharedStrings()
+    if 'xl/sharedStrings.xml' not in zf.namelist():
+        return table
+    with zf.open('xl/sharedStrings.xml') as f:
+        for event, elem in iterparse(f, events=('end',)):
+            if elem.tag == f'{MAIN_NS}si':
+                table.append(_text_of(elem))
+                elem.clear()
+    return table
+
+def _sheet_paths(zf):
+    """Return an ordered {sheet name: zip member path} mapping."""
+    rels = {}
+    with zf.open('xl/_rels/workbook.xml.rels') as f:
+        for event, elem in iterparse(f, events=('end',)):
+            if elem.tag == f'{PKG_REL_NS}Relationship':
+                target = elem.get('Target', '')
+                if target.startswith('/'):
+                    target = target.lstrip('/')
+                else:
+                    target = posixpath.normpath(posixpath.join('xl', target))
+                rels[elem.get('Id')] = target
+    sheets = {}
+    with zf.open('xl/workbook.xml') as f:
+        for event, elem in iterparse(f, events=('end',)):
+            if elem.tag == f'{MAIN_NS}sheet':
+                sheets[elem.get('name')] = rels.get(elem.get(f'{REL_NS}id'))
+    return sheets
+
+def _column_index(ref):
+    """Convert a cell reference like 'AB12' to a zero-based column index."""
+    index = 0
+    for ch in ref:
+        if not ch.isalpha():
+            break
+        index = index * 26 + (ord(ch.upper()) - 64)
+    return index - 1
+
+def _cell_value(cell, shared_strings):
+    cell_type = cell.get('t', 'n')
+    if cell_type == 'inlineStr':
+        inline = cell.find(f'{MAIN_NS}is')
+        return _text_of(inline) if inline is not None else ''
+    value = cell.findtext(f'{MAIN_NS}v')
+    if value is None:
+        return ''
+    if cell_type == 's':
+        return shared_strings[int(value)]
+    if cell_type == 'b':
+        return 'TRUE' if value == '1' else 'FALSE'
+    if cell_type == 'n' and value.endswith('.0'):
+        return value[:-2]
+    return value
+
+def iter_xlsx_rows(path, sheet=None):
+    """
+    Yield each row of a worksheet as a list of strings.
+
+    sheet is a sheet name; the first sheet is used when omitted. Gaps left by
+    empty cells are filled with '' so values stay in their columns.
+    """
+    with zipfile.ZipFile(path) as zf:
+        sheets = _sheet_paths(zf)
+        if not sheets:
+            return
+        member = sheets[sheet] if sheet else next(iter(sheets.values()))
+        shared_strings = _read_shared_strings(zf)
+
+        with zf.open(member) as f:
+            row = []
+            sheet_data = None
+            for event, elem in iterparse(f, events=('start', 'end')):
+                if event == 'start':
+                    if elem.tag == f'{MAIN_NS}sheetData':
+                        sheet_data = elem
+                    continue
+                if elem.tag == f'{MAIN_NS}c':
+                    ref = elem.get('r')
+                    if ref:
+                        col = _column_index(ref)
+                        if col > len(row):
+                            row.extend([''] * (col - len(row)))
+                    row.append(_cell_value(elem, shared_strings))
+                    elem.clear()
+                elif elem.tag == f'{MAIN_NS}row':
+                    while row and row[-1] == '':
+                        row.pop()
+                    yield row
+                    row = []
+                    # Drop finished rows from the tree so it never grows with the sheet
+                    if sheet_data is not None:
+                        sheet_data.clear()
+                    else:
+                        elem.clear()
+
+def iter_xlsx_dicts(path, sheet=None):
+    """Yield rows keyed by the stripped header values of the first non-empty row."""
+    header = None
+    for row in iter_xlsx_rows(path, sheet):
+        if header is None:
+            if any(value.strip() for value in row):
+                header = [value.strip() for value in row]
+            continue
+        if not any(value.strip() for value in row):
+            continue
+        yield {name: (row[i] if i < len(row) else '') for i, name in enumerate(header) if name}
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print(__doc__)
+        sys.exit(1)
+    writer = csv.writer(sys.stdout)
+    for row in iter_xlsx_rows(sys.argv[1], sys.argv[2] if len(sys.argv) == 3 else None):
+        writer.writerow(row)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The task scripts import their siblings as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'scripts'))
@@ -0,0 +1,136 @@
+import csv
+import io
+
+import pytest
+
+import row_index
+from atomic_io import ConcurrentModificationError
+
+HEADER = ['ID', 'Feature / Area', 'Description', 'Status', 'Notes', '', '']
+
+ROWS = [
+    ['TASK-001', 'Auth', 'Login loop', 'Not Started', 'short', '', ''],
+    ['TASK-002', 'Maps', 'Multi-line\nnotes, with "quotes"', 'Blocked', '', '', ''],
+    ['TASK-003', 'Billing', 'Checkout error', 'Passed', 'x', '', '', ' extra cell'],
+    ['TASK-004', 'Maps', 'Recenter on search', 'In Progress', '', '', ''],
+]
+
+def _csv_bytes(rows, terminator='\n'):
+    buffer = io.StringIO(newline='')
+    csv.writer(buffer, lineterminator=terminator).writerows(rows)
+    return buffer.getvalue().encode('utf-8')
+
+def _read_rows(path):
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return list(csv.reader(f))
+
+@pytest.fixture(params=['\n', '\r\n'], ids=['lf', 'crlf'])
+def master(tmp_path, request):
+    path = tmp_path / 'master.csv'
+    path.write_bytes(_csv_bytes([HEADER] + ROWS, request.param))
+    return path
+
+def _assert_index_matches_file(path):
+    index = row_index.load_index(path)
+    data = path.read_bytes()
+    for task_id, (offset, length) in index['records'].items():
+        record = data[offset:offset + length]
+        assert row_index._parse_record(record)[0] == task_id
+    assert set(index['records']) == {row[0] for row in _read_rows(path)[1:]}
+
+def test_index_spans_records_with_quoted_newlines(master):
+    index = row_index.build_index(master)
+    assert index['header'] == HEADER
+    assert row_index.get_task('TASK-002', master, index) == ROWS[1]
+    assert row_index.get_task('TASK-003', master, index) == ROWS[2]
+    assert row_index.get_task('TASK-404', master, index) is None
+    _assert_index_matches_file(master)
+
+@pytest.mark.parametrize('description', ['Login loop', 'Login', 'Login loop on every page refresh'])
+def test_patch_keeps_other_records_addressable(master, description):
+    row_index.build_index(master)
+    updated = ['TASK-001', 'Auth', description, 'Passed', 'short', '', '']
+    assert row_index.patch_tasks({'TASK-001': updated}, master) == 1
+
+    expected = [HEADER, updated] + ROWS[1:]
+    assert _read_rows(master) == expected
+    for row in ROWS[1:]:
+        assert row_index.get_task(row[0], master) == row
+    _assert_index_matches_file(master)
+
+def test_patch_several_records_shifts_offsets_between_them(master):
+    row_index.build_index(master)
+    updates = {
+        'TASK-002': ['TASK-002', 'Maps', 'Fixed', 'Passed', '', '', ''],
+        'TASK-004': ['TASK-004', 'Maps', 'Recenter on search and on zoom\nacross regions', 'Passed', '', '', ''],
+    }
+    row_index.patch_tasks(updates, master)
+    assert _read_rows(master) == [HEADER, ROWS[0], updates['TASK-002'], ROWS[2], updates['TASK-004']]
+    _assert_index_matches_file(master)
+
+def test_patch_preserves_line_endings_and_unchanged_bytes(master):
+    before = master.read_bytes()
+    index = row_index.build_index(master)
+    offset = index['records']['TASK-003'][0]
+    row_index.patch_tasks({'TASK-003': ['TASK-003', 'Billing', 'Checkout fixed', 'Passed', 'x', '', '']}, master)
+    after = master.read_bytes()
+    assert after[:offset] == before[:offset]
+    terminator = b'\r\n' if before.endswith(b'\r\n') else b'\n'
+    assert after.endswith(terminator) and not after.endswith(b'\r\r\n')
+
+def test_failed_patch_leaves_file_untouched(master, monkeypatch):
+    before = master.read_bytes()
+    row_index.build_index(master)
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(row_index.os, 'replace', fail)
+    with pytest.raises(OSError):
+        row_index.patch_tasks({'TASK-001': ['TASK-001', 'Auth', 'Changed', 'Passed', '', '', '']}, master)
+    assert master.read_bytes() == before
+    assert [p.name for p in master.parent.iterdir() if p.name.endswith('.tmp')] == []
+    monkeypatch.undo()
+    assert row_index.get_task('TASK-001', master) == ROWS[0]
+
+def test_unknown_id_raises(master):
+    with pytest.raises(KeyError):
+        row_index.patch_tasks({'TASK-999': ['TASK-999']}, master)
+
+def test_append_indexes_new_records(master):
+    row_index.build_index(master)
+    new = [['TASK-005', 'Auth', 'Password reset\nfrom email', 'Planned', '', '', '']]
+    assert row_index.append_tasks(new, master) == 1
+    assert _read_rows(master) == [HEADER] + ROWS + new
+    assert row_index.get_task('TASK-005', master) == new[0]
+    _assert_index_matches_file(master)
+
+def test_append_after_missing_final_newline(tmp_path):
+    path = tmp_path / 'master.csv'
+    path.write_bytes(_csv_bytes([HEADER] + ROWS).rstrip(b'\n'))
+    row_index.append_tasks([['TASK-005', 'Auth', 'New', 'Planned', '', '', '']], path)
+    assert _read_rows(path)[-2:] == [ROWS[-1], ['TASK-005', 'Auth', 'New', 'Planned', '', '', '']]
+    _assert_index_matches_file(path)
+
+def test_append_rejects_existing_ids(master):
+    before = master.read_bytes()
+    with pytest.raises(KeyError):
+        row_index.append_tasks([['TASK-001', 'Auth', 'Again', 'Planned']], master)
+    assert master.read_bytes() == before
+
+def test_index_rebuilds_after_external_edit(master):
+    row_index.build_index(master)
+    master.write_bytes(_csv_bytes([HEADER] + ROWS[::-1]))
+    assert row_index.get_task('TASK-001', master) == ROWS[0]
+    _assert_index_matches_file(master)
+
+def test_update_task_changes_only_named_cells(master):
+    fields = row_index.update_task('TASK-003', {'Status': 'Blocked'}, master)
+    assert fields == ['TASK-003', 'Billing', 'Checkout error', 'Blocked', 'x', '', '', ' extra cell']
+    assert _read_rows(master)[3] == fields
+
+def test_update_task_detects_concurrent_change(master):
+    with pytest.raises(ConcurrentModificationError):
+        row_index.update_task('TASK-001', {'Status': 'Passed'}, master, expected={'Status': 'Blocked'})
+    with pytest.raises(KeyError):
+        row_index.update_task('TASK-001', {'': 'x'}, master)